@@ -1,15 +1,30 @@
-from flask import Flask, render_template, send_from_directory, redirect, url_for, request, session, flash, jsonify
+from flask import Flask, render_template, send_from_directory, redirect, url_for, request, session, flash, g
 import os
 from werkzeug.middleware.proxy_fix import ProxyFix
+from werkzeug.security import safe_join
 import logging
 import sys
 import sqlite3
-import json
-import ast
+import threading
+import atexit
+import functools
+import hashlib
+import re
+import orjson
 from datetime import datetime, timezone, timedelta
+from flask_wtf import FlaskForm
 from flask_wtf.csrf import CSRFProtect
+from wtforms import StringField
+from wtforms.validators import Length
+from flask_caching import Cache
+from sqlalchemy import case, desc, distinct, func, insert, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 
-logging.basicConfig(level=logging.DEBUG)
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s %(levelname)s [%(name)s] %(message)s'
+)
 
 app = Flask(__name__, 
             template_folder='frontend/templates',
@@ -22,36 +37,154 @@ app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
 app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
     'pool_pre_ping': True,
     "pool_recycle": 300,
+    # The pool is per process and each gthread worker serves at most
+    # GUNICORN_THREADS requests at once, so size it to match
+    'pool_size': int(os.environ.get('GUNICORN_THREADS', 4)),
+    'max_overflow': 2,
+    'pool_timeout': 10,
+    # OAuth tokens are the only JSON column; route them through orjson too
+    'json_serializer': lambda obj: orjson.dumps(obj).decode(),
+    'json_deserializer': orjson.loads,
 }
+if app.config["SQLALCHEMY_DATABASE_URI"] and app.config["SQLALCHEMY_DATABASE_URI"].startswith('postgres'):
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"].update({
+        'executemany_mode': 'values_plus_batch',
+        'executemany_batch_page_size': 500,
+        'connect_args': {
+            'application_name': 'tnc-web',
+            'options': '-c statement_timeout=5000',
+        },
+    })
+# Static files keep their names when they change (the weekly charts are
+# rewritten in place), so cache them briefly and revalidate by ETag
+app.config["SEND_FILE_MAX_AGE_DEFAULT"] = 600
 app.config["WTF_CSRF_CHECK_DEFAULT"] = False
+app.config["CACHE_DEFAULT_TIMEOUT"] = 60
+# SimpleCache is per-process; point REDIS_URL at a Redis instance to share
+# cached responses (and invalidations) across gunicorn workers
+if os.environ.get("REDIS_URL"):
+    app.config["CACHE_TYPE"] = "RedisCache"
+    app.config["CACHE_REDIS_URL"] = os.environ["REDIS_URL"]
+else:
+    app.config["CACHE_TYPE"] = "SimpleCache"
 
 csrf = CSRFProtect(app)
+cache = Cache(app)
+
+def ojsonify(obj):
+    """jsonify() replacement that serializes with orjson.
+    
+    SQLAlchemy row mappings are encoded as objects, so query results can be
+    passed straight through without building a list of dicts first.
+    """
+    return app.response_class(orjson.dumps(obj, default=dict), mimetype='application/json')
 
 LEAGUE_DB_PATH = 'backend/data/databases/league.db'
 PROJECTIONS_DB_PATH = 'backend/data/databases/projections.db'
+ODDS_DB_PATH = 'backend/data/databases/odds.db'
+
+# Long-lived read-only SQLite connections, one per (thread, database file).
+# Reusing the handle avoids the open/close cost on every request and keeps
+# SQLite's page and prepared-statement caches warm between requests. All SQL
+# run on these connections is static text with bound parameters, so each
+# statement is compiled once per connection and then served from the cache.
+_sqlite_local = threading.local()
+_sqlite_conns = []
+_sqlite_conns_lock = threading.Lock()
+
+# Databases ATTACHed to a pooled connection so cross-file lookups can be
+# done in a single JOIN
+SQLITE_ATTACHMENTS = {
+    ODDS_DB_PATH: {'league': LEAGUE_DB_PATH},
+}
+
+def get_sqlite_conn(db_path):
+    conns = getattr(_sqlite_local, 'conns', None)
+    if conns is None:
+        conns = _sqlite_local.conns = {}
+    
+    conn = conns.get(db_path)
+    if conn is None:
+        conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None,
+                               cached_statements=256)
+        conn.row_factory = sqlite3.Row
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute('PRAGMA temp_store=MEMORY')
+        conn.execute('PRAGMA cache_size=-64000')
+        conn.execute('PRAGMA mmap_size=268435456')
+        for alias, attached_path in SQLITE_ATTACHMENTS.get(db_path, {}).items():
+            conn.execute(f'ATTACH DATABASE ? AS {alias}', (attached_path,))
+        conn.execute('PRAGMA query_only=1')
+        conns[db_path] = conn
+        with _sqlite_conns_lock:
+            _sqlite_conns.append(conn)
+    
+    return conn
+
+@atexit.register
+def close_sqlite_conns():
+    with _sqlite_conns_lock:
+        for conn in _sqlite_conns:
+            conn.close()
+        _sqlite_conns.clear()
+    _sqlite_local.__dict__.clear()
+
+def sqlite_db_version(*db_paths):
+    """Modification stamps for SQLite files, for use in cache keys.
+    
+    The scraper notebooks rebuild these databases in place, so folding the
+    stamps into a cache key picks up new data without waiting out the TTL.
+    """
+    stamps = []
+    for db_path in db_paths:
+        try:
+            stamps.append(os.stat(db_path).st_mtime_ns)
+        except OSError:
+            stamps.append(None)
+    return tuple(stamps)
 
 # Initialize database
 from database import db
+from models import Bet, BettingPeriod, User, WeeklyStats
 db.init_app(app)
 
+# Bump whenever run_schema_migrations gains a step, so databases that
+# already recorded the previous version run it once more
+SCHEMA_VERSION = 2
+
 # Create tables
 def run_schema_migrations():
     try:
         from sqlalchemy import inspect, text
         
-        # Helper to check if column exists
-        def column_exists(inspector, table_name, column_name):
-            if table_name not in inspector.get_table_names():
-                return False
-            columns = [col['name'] for col in inspector.get_columns(table_name)]
-            return column_name in columns
-        
         # Detect database dialect
         dialect = db.engine.dialect.name
         logging.info(f"Running schema migrations for dialect: {dialect}")
         
         with db.engine.begin() as conn:
-            inspector = inspect(db.engine)
+            if dialect == 'postgresql':
+                # The connection-wide 5s statement_timeout is meant for requests;
+                # the column rewrites and index builds below can take longer
+                conn.execute(text('SET LOCAL statement_timeout = 0'))
+            
+            conn.execute(text(
+                'CREATE TABLE IF NOT EXISTS schema_version '
+                '(version INTEGER PRIMARY KEY, applied_at TIMESTAMP)'
+            ))
+            applied = conn.execute(text('SELECT MAX(version) FROM schema_version')).scalar()
+            if applied is not None and applied >= SCHEMA_VERSION:
+                logging.info(f"Schema already at version {applied}, skipping migrations")
+                return
+            
+            # Reflect every table's columns once up front instead of per check
+            inspector = inspect(conn)
+            existing_columns = {
+                table: {col['name'] for col in inspector.get_columns(table)}
+                for table in inspector.get_table_names()
+            }
+            
+            def column_exists(table_name, column_name):
+                return column_name in existing_columns.get(table_name, ())
             
             # Migrate datetime columns to timezone-aware (PostgreSQL only)
             # SQLite doesn't need this as it stores datetimes as TEXT/REAL
@@ -68,32 +201,44 @@ def run_schema_migrations():
                     ('betting_periods', 'updated_at'),
                 ]
                 
+                # One information_schema round trip for all candidate columns
+                column_types = {
+                    (table, column): data_type
+                    for table, column, data_type in conn.execute(text('''
+                        SELECT table_name, column_name, data_type
+                        FROM information_schema.columns
+                        WHERE table_name = ANY(:tables)
+                        AND column_name = ANY(:columns)
+                    '''), {
+                        'tables': sorted({table for table, _ in datetime_migrations}),
+                        'columns': sorted({column for _, column in datetime_migrations}),
+                    })
+                }
+                
+                # Group the pending conversions so each table is rewritten by a
+                # single ALTER TABLE. Identifiers can't be bound parameters; they
+                # only ever come from the datetime_migrations allowlist above.
+                pending = {}
                 for table, column in datetime_migrations:
-                    if column_exists(inspector, table, column):
-                        try:
-                            result = conn.execute(text(f'''
-                                SELECT data_type 
-                                FROM information_schema.columns 
-                                WHERE table_name = '{table}' 
-                                AND column_name = '{column}'
-                            ''')).first()
-                            
-                            if result and result[0] == 'timestamp without time zone':
-                                conn.execute(text(f'''
-                                    ALTER TABLE {table} 
-                                    ALTER COLUMN {column} TYPE TIMESTAMP WITH TIME ZONE 
-                                    USING {column} AT TIME ZONE 'UTC'
-                                '''))
-                                logging.info(f"Converted {table}.{column} to TIMESTAMPTZ")
-                        except Exception as col_error:
-                            logging.error(f"Error converting {table}.{column}: {col_error}")
+                    if column_types.get((table, column)) == 'timestamp without time zone':
+                        pending.setdefault(table, []).append(column)
+                
+                for table, columns in pending.items():
+                    conn.execute(text(f'ALTER TABLE {table} ' + ', '.join(
+                        f"ALTER COLUMN {column} TYPE TIMESTAMP WITH TIME ZONE USING {column} AT TIME ZONE 'UTC'"
+                        for column in columns
+                    )))
+                    logging.info(f"Converted {table}.{', '.join(columns)} to TIMESTAMPTZ")
+                
+                # Give rows inserted outside the ORM a created_at too. PostgreSQL
+                # only: now() is a TIMESTAMPTZ there, while SQLite's CURRENT_TIMESTAMP
+                # would be a naive string, so the model keeps just the utc_now default
+                conn.execute(text('ALTER TABLE bets ALTER COLUMN created_at SET DEFAULT now()'))
             else:
                 logging.info(f"{dialect} detected: skipping timezone migration (not needed)")
             
             # Add missing columns (all dialects)
-            inspector = inspect(db.engine)
-            
-            if not column_exists(inspector, 'users', 'is_admin'):
+            if not column_exists('users', 'is_admin'):
                 logging.info("Adding is_admin column to users")
                 if dialect == 'postgresql':
                     conn.execute(text('ALTER TABLE users ADD COLUMN is_admin BOOLEAN DEFAULT FALSE'))
@@ -101,52 +246,77 @@ def run_schema_migrations():
                     conn.execute(text('ALTER TABLE users ADD COLUMN is_admin INTEGER DEFAULT 0'))
                 logging.info("is_admin column added")
             
-            if not column_exists(inspector, 'weekly_stats', 'active_bets_amount'):
+            if not column_exists('weekly_stats', 'active_bets_amount'):
                 logging.info("Adding active_bets_amount column to weekly_stats")
                 if dialect == 'postgresql':
                     conn.execute(text('ALTER TABLE weekly_stats ADD COLUMN active_bets_amount DOUBLE PRECISION DEFAULT 0.0'))
                 else:
                     conn.execute(text('ALTER TABLE weekly_stats ADD COLUMN active_bets_amount REAL DEFAULT 0.0'))
                 
-                # Backfill values
+                # Backfill values in one aggregate pass; rows without pending
+                # bets keep the column default
                 conn.execute(text('''
                     UPDATE weekly_stats
-                    SET active_bets_amount = COALESCE((
-                        SELECT SUM(b.amount)
-                        FROM bets b
-                        WHERE b.user_id = weekly_stats.user_id
-                          AND b.week = weekly_stats.week
-                          AND b.status = 'pending'
-                    ), 0.0)
+                    SET active_bets_amount = agg.total
+                    FROM (
+                        SELECT user_id, week, SUM(amount) AS total
+                        FROM bets
+                        WHERE status = 'pending'
+                        GROUP BY user_id, week
+                    ) AS agg
+                    WHERE weekly_stats.user_id = agg.user_id
+                      AND weekly_stats.week = agg.week
                 '''))
                 logging.info("active_bets_amount column added and backfilled")
             
-            if not column_exists(inspector, 'weekly_stats', 'settled_pnl'):
+            if not column_exists('weekly_stats', 'settled_pnl'):
                 logging.info("Adding settled_pnl column to weekly_stats")
                 if dialect == 'postgresql':
                     conn.execute(text('ALTER TABLE weekly_stats ADD COLUMN settled_pnl DOUBLE PRECISION DEFAULT 0.0'))
                 else:
                     conn.execute(text('ALTER TABLE weekly_stats ADD COLUMN settled_pnl REAL DEFAULT 0.0'))
                 
-                # Backfill values
+                # Backfill values in one aggregate pass
                 conn.execute(text('''
                     UPDATE weekly_stats
-                    SET settled_pnl = COALESCE((
-                        SELECT SUM(b.result)
-                        FROM bets b
-                        WHERE b.user_id = weekly_stats.user_id
-                          AND b.week = weekly_stats.week
-                          AND b.status IN ('won', 'lost')
-                    ), 0.0)
+                    SET settled_pnl = agg.total
+                    FROM (
+                        SELECT user_id, week, SUM(result) AS total
+                        FROM bets
+                        WHERE status IN ('won', 'lost')
+                        GROUP BY user_id, week
+                    ) AS agg
+                    WHERE weekly_stats.user_id = agg.user_id
+                      AND weekly_stats.week = agg.week
                 '''))
                 logging.info("settled_pnl column added and backfilled")
             
+            if not column_exists('bets', 'odds_num'):
+                logging.info("Adding odds_num column to bets")
+                conn.execute(text('ALTER TABLE bets ADD COLUMN odds_num INTEGER'))
+                conn.execute(text('''
+                    UPDATE bets
+                    SET odds_num = CAST(REPLACE(REPLACE(odds, '+', ''), 'EVEN', '0') AS INTEGER)
+                '''))
+                logging.info("odds_num column added and backfilled")
+            
+            # No query filters bets on (user_id, week, status); it only slowed writes
+            conn.execute(text('DROP INDEX IF EXISTS ix_bet_user_week_status'))
+            
+            # create_all() skips tables that already exist, so make sure indexes
+            # declared after the table was first created are present too
+            for table in (Bet.__table__, WeeklyStats.__table__):
+                for index in table.indexes:
+                    index.create(conn, checkfirst=True)
+            
+            conn.execute(text(
+                'INSERT INTO schema_version (version, applied_at) VALUES (:version, CURRENT_TIMESTAMP)'
+            ), {'version': SCHEMA_VERSION})
+            
             logging.info("Schema migrations completed successfully")
             
-    except Exception as e:
-        logging.error(f"Migration error: {e}")
-        import traceback
-        traceback.print_exc()
+    except Exception:
+        logging.exception("Migration error")
 
 with app.app_context():
     import models  # noqa: F401
@@ -191,38 +361,82 @@ def index():
 def about():
     return render_template('about.html')
 
+# Rendered HTML for pages whose only dynamic content is the viewing user,
+# cached per user. Balance-changing writes drop that user's entries.
+CACHED_PAGES = ('/analytics', '/betting')
+
+def page_cache_key():
+    return f"page:{request.path}:{current_user.get_id() or 'anon'}"
+
+def per_user_cache_disabled():
+    # These entries embed balances. With the per-process SimpleCache an
+    # invalidation only reaches the worker that handled the write, so they
+    # are only cached on a shared backend.
+    return app.config["CACHE_TYPE"] == "SimpleCache"
+
+def invalidate_user_cache(user_id):
+    cache.delete_many(*[f"page:{path}:{user_id}" for path in CACHED_PAGES])
+    cache.delete_memoized(_account_ctx, user_id)
+
 @app.route('/analytics')
+@cache.cached(timeout=120, key_prefix=page_cache_key, unless=per_user_cache_disabled)
 def analytics():
     week = get_current_week()
     return render_template('analytics.html', user=current_user if current_user.is_authenticated else None, current_week=week)
 
+@cache.memoize(timeout=30, unless=per_user_cache_disabled)
+def _account_ctx(user_id):
+    """Recent bets and weekly stats for the account page, as plain dicts."""
+    bets = db.session.execute(
+        select(Bet.week, Bet.description, Bet.bet_type, Bet.amount, Bet.odds, Bet.status, Bet.result)
+        .where(Bet.user_id == user_id)
+        .order_by(Bet.created_at.desc())
+        .limit(20)
+    ).mappings().all()
+    
+    weekly_stats = db.session.execute(
+        select(WeeklyStats.week, WeeklyStats.active_bets_amount, WeeklyStats.settled_pnl)
+        .where(WeeklyStats.user_id == user_id)
+        .order_by(WeeklyStats.week.desc())
+    ).mappings().all()
+    
+    return [dict(row) for row in bets], [dict(row) for row in weekly_stats]
+
 @app.route('/account')
 @require_login
 def account():
-    from models import Bet, WeeklyStats
-    from sqlalchemy.orm import joinedload
-    
-    # Optimize queries by limiting and ordering properly
-    bets = db.session.query(Bet).filter_by(user_id=current_user.id).order_by(Bet.created_at.desc()).limit(20).all()
-    weekly_stats = db.session.query(WeeklyStats).filter_by(user_id=current_user.id).order_by(WeeklyStats.week.desc()).all()
+    bets, weekly_stats = _account_ctx(current_user.id)
     
     return render_template('account.html', user=current_user, bets=bets, weekly_stats=weekly_stats)
 
+def _strip(value):
+    return value.strip() if value else value
+
+class ProfileForm(FlaskForm):
+    # update_profile already enforces CSRF through csrf.protect()
+    class Meta:
+        csrf = False
+    
+    first_name = StringField(filters=[_strip], validators=[
+        Length(max=100, message='First name must be 100 characters or less.')
+    ])
+    last_name = StringField(filters=[_strip], validators=[
+        Length(max=100, message='Last name must be 100 characters or less.')
+    ])
+
 @app.route('/account/update-profile', methods=['POST'])
 @require_login
 def update_profile():
     csrf.protect()
+    form = ProfileForm()
+    if not form.validate_on_submit():
+        # Report the first failing field, first name before last name
+        flash(next(iter(form.errors.values()))[0], 'error')
+        return redirect(url_for('account'))
+    
     try:
-        first_name = request.form.get('first_name', '').strip()
-        last_name = request.form.get('last_name', '').strip()
-        
-        if len(first_name) > 100:
-            flash('First name must be 100 characters or less.', 'error')
-            return redirect(url_for('account'))
-        
-        if len(last_name) > 100:
-            flash('Last name must be 100 characters or less.', 'error')
-            return redirect(url_for('account'))
+        first_name = form.first_name.data
+        last_name = form.last_name.data
         
         current_user.first_name = first_name if first_name else None
         current_user.last_name = last_name if last_name else None
@@ -239,31 +453,31 @@ def update_profile():
     return redirect(url_for('account'))
 
 @app.route('/betting')
+@cache.cached(timeout=120, key_prefix=page_cache_key, unless=per_user_cache_disabled)
 def betting():
     return render_template('betting.html', user=current_user if current_user.is_authenticated else None)
 
-@app.route('/leaderboard')
-def leaderboard():
-    from models import Bet, WeeklyStats, User
-    from sqlalchemy import func, desc, case, distinct
-    
-    current_week = get_current_week()
-    selected_week = request.args.get('week', current_week, type=int)
+@cache.memoize(timeout=30)
+def _leaderboard_ctx(selected_week):
+    """Standings and bet highlights for the leaderboard page.
     
+    The same for every viewer, so it's shared between requests and
+    dropped whenever bets are settled.
+    """
     # Get available weeks for dropdown
     available_weeks = db.session.query(distinct(WeeklyStats.week))\
         .order_by(desc(WeeklyStats.week)).all()
     available_weeks = [w[0] for w in available_weeks]
     
     # All-Time Top 3 and Bottom 2 (only users with at least 1 bet)
-    users_with_bets = db.session.query(Bet.user_id).group_by(Bet.user_id).subquery()
+    has_bets = db.session.query(Bet.id).filter(Bet.user_id == User.id).exists()
     
     alltime_top = db.session.query(
         User.id,
         User.first_name,
         User.last_name,
         User.total_pnl
-    ).join(users_with_bets, User.id == users_with_bets.c.user_id)\
+    ).filter(has_bets)\
      .order_by(desc(User.total_pnl)).limit(3).all()
     
     alltime_bottom = db.session.query(
@@ -271,7 +485,7 @@ def leaderboard():
         User.first_name,
         User.last_name,
         User.total_pnl
-    ).join(users_with_bets, User.id == users_with_bets.c.user_id)\
+    ).filter(has_bets)\
      .order_by(User.total_pnl.asc()).limit(2).all()
     
     # Weekly Top 3 and Bottom 2 (only users who placed a bet that week)
@@ -296,9 +510,9 @@ def leaderboard():
      .limit(2).all()
     
     # Best Bets - Highest odds that won (best odds = highest number like +637)
-    # Convert odds to numeric for proper sorting: +637 > +200 > EVEN > -110
+    # Sort on the numeric odds: +637 > +200 > EVEN > -110. Rows inserted outside
+    # place_bet may have no odds_num, so NULLs go last in both directions
     # Aggregate bets with same user_id, description, odds, week
-    from sqlalchemy import cast, Integer
     best_odds_bet = db.session.query(
         Bet.description,
         Bet.odds,
@@ -308,8 +522,8 @@ def leaderboard():
         User.last_name
     ).join(User, Bet.user_id == User.id)\
      .filter(Bet.status == 'won')\
-     .group_by(Bet.user_id, Bet.description, Bet.odds, Bet.week, User.first_name, User.last_name)\
-     .order_by(desc(cast(func.replace(func.replace(Bet.odds, '+', ''), 'EVEN', '0'), Integer))).first()
+     .group_by(Bet.user_id, Bet.description, Bet.odds, Bet.odds_num, Bet.week, User.first_name, User.last_name)\
+     .order_by(desc(Bet.odds_num).nulls_last()).first()
     
     # Most Money Won (biggest win result)
     # Aggregate bets with same user_id, description, odds, week
@@ -326,7 +540,7 @@ def leaderboard():
      .order_by(desc(func.sum(Bet.result))).first()
     
     # Worst Bets - Worst odds that lost (worst odds = lowest number like -200)
-    # Convert odds to numeric for proper sorting: -200 < -110 < EVEN < +200
+    # Sort on the numeric odds: -200 < -110 < EVEN < +200
     # Aggregate bets with same user_id, description, odds, week
     worst_odds_bet = db.session.query(
         Bet.description,
@@ -337,8 +551,8 @@ def leaderboard():
         User.last_name
     ).join(User, Bet.user_id == User.id)\
      .filter(Bet.status == 'lost')\
-     .group_by(Bet.user_id, Bet.description, Bet.odds, Bet.week, Bet.result, User.first_name, User.last_name)\
-     .order_by(cast(func.replace(func.replace(Bet.odds, '+', ''), 'EVEN', '0'), Integer).asc()).first()
+     .group_by(Bet.user_id, Bet.description, Bet.odds, Bet.odds_num, Bet.week, Bet.result, User.first_name, User.last_name)\
+     .order_by(Bet.odds_num.asc().nulls_last()).first()
     
     # Most Money Lost on a single bet
     # Aggregate bets with same user_id, description, odds, week
@@ -354,278 +568,419 @@ def leaderboard():
      .group_by(Bet.user_id, Bet.description, Bet.odds, Bet.week, Bet.result, User.first_name, User.last_name)\
      .order_by(desc(func.sum(Bet.amount))).first()
     
-    # Most Popular Bets with win/loss status and total money placed
-    def get_popular_bet_with_stats(bet_type):
-        result = db.session.query(
-            Bet.description,
-            func.count(Bet.id).label('count'),
-            func.sum(case((Bet.status == 'won', 1), else_=0)).label('wins'),
-            func.sum(case((Bet.status == 'lost', 1), else_=0)).label('losses'),
-            func.sum(case((Bet.status == 'pending', 1), else_=0)).label('pending'),
-            func.sum(Bet.amount).label('total_wagered')
-        ).filter(Bet.bet_type == bet_type)\
-         .group_by(Bet.description)\
-         .order_by(desc('count'))\
-         .first()
-        return result
-    
-    popular_moneyline = get_popular_bet_with_stats('moneyline')
-    popular_over_under = get_popular_bet_with_stats('team_ou')
-    popular_highest = get_popular_bet_with_stats('highest_scorer')
-    popular_lowest = get_popular_bet_with_stats('lowest_scorer')
+    # Most Popular Bets with win/loss status and total money placed, one per
+    # bet type, ranked in the same query
+    bet_counts = db.session.query(
+        Bet.description,
+        func.count(Bet.id).label('count'),
+        func.sum(case((Bet.status == 'won', 1), else_=0)).label('wins'),
+        func.sum(case((Bet.status == 'lost', 1), else_=0)).label('losses'),
+        func.sum(case((Bet.status == 'pending', 1), else_=0)).label('pending'),
+        func.sum(Bet.amount).label('total_wagered'),
+        # Kept after the columns the template reads by position
+        Bet.bet_type,
+        func.row_number().over(
+            partition_by=Bet.bet_type,
+            order_by=desc(func.count(Bet.id))
+        ).label('rank')
+    ).filter(Bet.bet_type.in_(['moneyline', 'team_ou', 'highest_scorer', 'lowest_scorer']))\
+     .group_by(Bet.bet_type, Bet.description)\
+     .subquery()
+    
+    popular_bets = {
+        row.bet_type: row
+        for row in db.session.query(bet_counts).filter(bet_counts.c.rank == 1)
+    }
+    popular_moneyline = popular_bets.get('moneyline')
+    popular_over_under = popular_bets.get('team_ou')
+    popular_highest = popular_bets.get('highest_scorer')
+    popular_lowest = popular_bets.get('lowest_scorer')
+    
+    return {
+        'available_weeks': available_weeks,
+        'weekly_top': weekly_top,
+        'weekly_bottom': weekly_bottom,
+        'alltime_top': alltime_top,
+        'alltime_bottom': alltime_bottom,
+        'best_odds_bet': best_odds_bet,
+        'most_money_won': most_money_won,
+        'worst_odds_bet': worst_odds_bet,
+        'biggest_loss': biggest_loss,
+        'popular_moneyline': popular_moneyline,
+        'popular_over_under': popular_over_under,
+        'popular_highest': popular_highest,
+        'popular_lowest': popular_lowest,
+    }
+
+@app.route('/leaderboard')
+def leaderboard():
+    current_week = get_current_week()
+    selected_week = request.args.get('week', current_week, type=int)
     
     return render_template('leaderboard.html',
                          user=current_user if current_user.is_authenticated else None,
                          current_week=current_week,
                          selected_week=selected_week,
-                         available_weeks=available_weeks,
-                         weekly_top=weekly_top,
-                         weekly_bottom=weekly_bottom,
-                         alltime_top=alltime_top,
-                         alltime_bottom=alltime_bottom,
-                         best_odds_bet=best_odds_bet,
-                         most_money_won=most_money_won,
-                         worst_odds_bet=worst_odds_bet,
-                         biggest_loss=biggest_loss,
-                         popular_moneyline=popular_moneyline,
-                         popular_over_under=popular_over_under,
-                         popular_highest=popular_highest,
-                         popular_lowest=popular_lowest)
+                         **_leaderboard_ctx(selected_week))
 
-ODDS_DB_PATH = 'backend/data/databases/odds.db'
+@cache.memoize(timeout=60)
+def _week_matchups(week, data_version=None):
+    """Return the moneyline matchups for a week with owner names resolved."""
+    cursor = get_sqlite_conn(ODDS_DB_PATH).cursor()
+    cursor.row_factory = None
+    
+    # Resolve owner names from the attached league database in the same query
+    cursor.execute("""
+        SELECT m.matchup, m.team1_id, m.team1_win_prob, m.team1_ml,
+               m.team2_id, m.team2_win_prob, m.team2_ml,
+               COALESCE(NULLIF(u1.display_name, ''), NULLIF(u1.username, ''), 'Team ' || m.team1_id) AS team1_owner,
+               COALESCE(NULLIF(u2.display_name, ''), NULLIF(u2.username, ''), 'Team ' || m.team2_id) AS team2_owner
+        FROM betting_odds_matchup_ml m
+        LEFT JOIN league.rosters r1 ON r1.roster_id = m.team1_id
+        LEFT JOIN league.users u1 ON u1.user_id = r1.owner_id
+        LEFT JOIN league.rosters r2 ON r2.roster_id = m.team2_id
+        LEFT JOIN league.users u2 ON u2.user_id = r2.owner_id
+        WHERE m.week = ?
+        ORDER BY m.matchup
+    """, (week,))
+    
+    matchups = []
+    for (matchup, team1_id, team1_win_prob, team1_ml,
+         team2_id, team2_win_prob, team2_ml, team1_owner, team2_owner) in cursor.fetchall():
+        matchups.append({
+            'matchup': f"{team1_owner} vs {team2_owner}",
+            'original_matchup': matchup,
+            'team1_id': team1_id,
+            'team1_name': team1_owner,
+            'team1_win_prob': team1_win_prob,
+            'team1_ml': team1_ml,
+            'team2_id': team2_id,
+            'team2_name': team2_owner,
+            'team2_win_prob': team2_win_prob,
+            'team2_ml': team2_ml
+        })
+    
+    return matchups
+
+def cacheable_response(rv):
+    # Error responses are returned with a non-200 status so they are served
+    # once rather than for the whole cache timeout
+    if isinstance(rv, tuple):
+        return len(rv) < 2 or not isinstance(rv[1], int) or rv[1] == 200
+    return getattr(rv, 'status_code', 200) == 200
+
+def odds_cache_key():
+    # Odds responses are identical for every user; key them on the week and
+    # the odds/league data they were built from
+    return f"odds:{request.path}:{get_current_week()}:{sqlite_db_version(ODDS_DB_PATH, LEAGUE_DB_PATH)}"
 
 @app.route('/api/matchups')
+@cache.cached(timeout=60, key_prefix=odds_cache_key, response_filter=cacheable_response)
 def get_matchups():
     try:
-        team_mapping = {}
-        week = get_current_week()
-        
-        # Get team ID to owner name mapping from league database
-        with sqlite3.connect(LEAGUE_DB_PATH) as league_conn:
-            league_conn.row_factory = sqlite3.Row
-            league_cursor = league_conn.cursor()
-            
-            league_cursor.execute("""
-                SELECT r.roster_id, u.display_name, u.username
-                FROM rosters r
-                LEFT JOIN users u ON r.owner_id = u.user_id
-            """)
-            
-            for row in league_cursor.fetchall():
-                owner_name = row['display_name'] or row['username'] or f"Team {row['roster_id']}"
-                team_mapping[row['roster_id']] = owner_name
-        
-        # Get matchup odds
-        with sqlite3.connect(ODDS_DB_PATH) as conn:
-            conn.row_factory = sqlite3.Row
-            cursor = conn.cursor()
-            
-            cursor.execute("""
-                SELECT * FROM betting_odds_matchup_ml
-                WHERE week = ?
-                ORDER BY matchup
-            """, (week,))
-            
-            matchups = []
-            for row in cursor.fetchall():
-                team1_owner = team_mapping.get(row['team1_id'], f"Team {row['team1_id']}")
-                team2_owner = team_mapping.get(row['team2_id'], f"Team {row['team2_id']}")
-                
-                matchups.append({
-                    'matchup': f"{team1_owner} vs {team2_owner}",
-                    'original_matchup': row['matchup'],
-                    'team1_id': row['team1_id'],
-                    'team1_name': team1_owner,
-                    'team1_win_prob': row['team1_win_prob'],
-                    'team1_ml': row['team1_ml'],
-                    'team2_id': row['team2_id'],
-                    'team2_name': team2_owner,
-                    'team2_win_prob': row['team2_win_prob'],
-                    'team2_ml': row['team2_ml']
-                })
-        
-        return jsonify(matchups)
-    except Exception as e:
-        print(f"Error getting matchups: {e}")
-        import traceback
-        traceback.print_exc()
-        return jsonify([])
+        return ojsonify(_week_matchups(get_current_week(), sqlite_db_version(ODDS_DB_PATH, LEAGUE_DB_PATH)))
+    except Exception:
+        app.logger.exception("Error getting matchups")
+        return ojsonify([]), 500
 
 @app.route('/api/team_performance')
+@cache.cached(timeout=60, key_prefix=odds_cache_key, response_filter=cacheable_response)
 def get_team_performance():
     try:
         week = get_current_week()
         
-        with sqlite3.connect(ODDS_DB_PATH) as conn:
-            conn.row_factory = sqlite3.Row
-            cursor = conn.cursor()
-            
-            cursor.execute("""
-                SELECT * FROM betting_odds_team_ou
-                WHERE week = ?
-                ORDER BY owner
-            """, (week,))
-            
-            teams = []
-            for row in cursor.fetchall():
-                teams.append({
-                    'team_id': row['team_id'],
-                    'owner': row['owner'],
-                    'line': row['line'],
-                    'over_prob': row['over_prob'],
-                    'under_prob': row['under_prob']
-                })
-        
-        return jsonify(teams)
-    except Exception as e:
-        print(f"Error getting team performance: {e}")
-        import traceback
-        traceback.print_exc()
-        return jsonify([])
+        cursor = get_sqlite_conn(ODDS_DB_PATH).cursor()
+        
+        cursor.execute("""
+            SELECT * FROM betting_odds_team_ou
+            WHERE week = ?
+            ORDER BY owner
+        """, (week,))
+        
+        teams = []
+        for row in cursor.fetchall():
+            teams.append({
+                'team_id': row['team_id'],
+                'owner': row['owner'],
+                'line': row['line'],
+                'over_prob': row['over_prob'],
+                'under_prob': row['under_prob']
+            })
+        
+        return ojsonify(teams)
+    except Exception:
+        app.logger.exception("Error getting team performance")
+        return ojsonify([]), 500
 
 @app.route('/api/highest_scorer')
+@cache.cached(timeout=60, key_prefix=odds_cache_key, response_filter=cacheable_response)
 def get_highest_scorer():
     try:
         week = get_current_week()
         
-        with sqlite3.connect(ODDS_DB_PATH) as conn:
-            conn.row_factory = sqlite3.Row
-            cursor = conn.cursor()
-            
-            cursor.execute("""
-                SELECT owner, probability, odds
-                FROM betting_odds_highest_scorer
-                WHERE week = ?
-                ORDER BY probability DESC
-            """, (week,))
-            
-            teams = []
-            for row in cursor.fetchall():
-                teams.append({
-                    'owner': row['owner'],
-                    'win_prob': round(row['probability'] * 100, 1),
-                    'odds': row['odds']
-                })
-        
-        return jsonify(teams)
-    except Exception as e:
-        print(f"Error getting highest scorer: {e}")
-        import traceback
-        traceback.print_exc()
-        return jsonify([])
+        cursor = get_sqlite_conn(ODDS_DB_PATH).cursor()
+        
+        cursor.execute("""
+            SELECT owner, probability, odds
+            FROM betting_odds_highest_scorer
+            WHERE week = ?
+            ORDER BY probability DESC
+        """, (week,))
+        
+        teams = []
+        for row in cursor.fetchall():
+            teams.append({
+                'owner': row['owner'],
+                'win_prob': round(row['probability'] * 100, 1),
+                'odds': row['odds']
+            })
+        
+        return ojsonify(teams)
+    except Exception:
+        app.logger.exception("Error getting highest scorer")
+        return ojsonify([]), 500
 
 @app.route('/api/lowest_scorer')
+@cache.cached(timeout=60, key_prefix=odds_cache_key, response_filter=cacheable_response)
 def get_lowest_scorer():
     try:
         week = get_current_week()
         
-        with sqlite3.connect(ODDS_DB_PATH) as conn:
-            conn.row_factory = sqlite3.Row
-            cursor = conn.cursor()
-            
-            cursor.execute("""
-                SELECT owner, probability, odds
-                FROM betting_odds_lowest_scorer
-                WHERE week = ?
-                ORDER BY probability DESC
-            """, (week,))
-            
-            teams = []
-            for row in cursor.fetchall():
-                teams.append({
-                    'owner': row['owner'],
-                    'win_prob': round(row['probability'] * 100, 1),
-                    'odds': row['odds']
-                })
-        
-        return jsonify(teams)
-    except Exception as e:
-        print(f"Error getting lowest scorer: {e}")
-        import traceback
-        traceback.print_exc()
-        return jsonify([])
+        cursor = get_sqlite_conn(ODDS_DB_PATH).cursor()
+        
+        cursor.execute("""
+            SELECT owner, probability, odds
+            FROM betting_odds_lowest_scorer
+            WHERE week = ?
+            ORDER BY probability DESC
+        """, (week,))
+        
+        teams = []
+        for row in cursor.fetchall():
+            teams.append({
+                'owner': row['owner'],
+                'win_prob': round(row['probability'] * 100, 1),
+                'odds': row['odds']
+            })
+        
+        return ojsonify(teams)
+    except Exception:
+        app.logger.exception("Error getting lowest scorer")
+        return ojsonify([]), 500
+
+LINEUP_SLOT_ORDER = {slot: i for i, slot in enumerate(('QB', 'RB1', 'RB2', 'WR1', 'WR2', 'TE', 'FLEX', 'K', 'DEF'))}
+
+@cache.memoize(timeout=60)
+def _week_lineups(week, data_version=None):
+    """Return every owner's starting lineup for a week, keyed by owner."""
+    cursor = get_sqlite_conn(PROJECTIONS_DB_PATH).cursor()
+    cursor.row_factory = None
+    
+    # Starting slots only; ordering is applied in Python via LINEUP_SLOT_ORDER
+    cursor.execute("""
+        SELECT owner, slot, player_name, position, mu
+        FROM team_lineups
+        WHERE week = ?
+            AND slot IN ('QB', 'RB1', 'RB2', 'WR1', 'WR2', 'TE', 'FLEX', 'K', 'DEF')
+    """, (week,))
+    
+    lineups = {}
+    for owner, slot, player_name, position, mu in sorted(cursor.fetchall(), key=lambda row: LINEUP_SLOT_ORDER[row[1]]):
+        lineups.setdefault(owner, []).append({
+            'slot': slot,
+            'player_name': player_name,
+            'position': position,
+            'projected_points': round(mu, 1)
+        })
+    
+    return lineups
 
 @app.route('/api/lineup/<owner>')
 def get_lineup(owner):
     """Public endpoint - anyone can view team lineups for research/preview"""
     try:
-        week = get_current_week()
-        
-        with sqlite3.connect(PROJECTIONS_DB_PATH) as conn:
-            conn.row_factory = sqlite3.Row
-            cursor = conn.cursor()
-            
-            # Fetch lineup for the owner with proper slot ordering
-            cursor.execute("""
-                SELECT slot, player_name, position, mu
-                FROM team_lineups
-                WHERE owner = ? AND week = ? 
-                    AND slot IN ('QB', 'RB1', 'RB2', 'WR1', 'WR2', 'TE', 'FLEX', 'K', 'DEF')
-                ORDER BY 
-                    CASE slot
-                        WHEN 'QB' THEN 1
-                        WHEN 'RB1' THEN 2
-                        WHEN 'RB2' THEN 3
-                        WHEN 'WR1' THEN 4
-                        WHEN 'WR2' THEN 5
-                        WHEN 'TE' THEN 6
-                        WHEN 'FLEX' THEN 7
-                        WHEN 'K' THEN 8
-                        WHEN 'DEF' THEN 9
-                        ELSE 10
-                    END
-            """, (owner, week))
-            
-            lineup = []
-            for row in cursor.fetchall():
-                lineup.append({
-                    'slot': row['slot'],
-                    'player_name': row['player_name'],
-                    'position': row['position'],
-                    'projected_points': round(row['mu'], 1)
-                })
-        
-        return jsonify(lineup)
-    except Exception as e:
-        print(f"Error getting lineup: {e}")
-        import traceback
-        traceback.print_exc()
-        return jsonify([])
+        lineups = _week_lineups(get_current_week(), sqlite_db_version(PROJECTIONS_DB_PATH))
+        return ojsonify(lineups.get(owner, []))
+    except Exception:
+        app.logger.exception("Error getting lineup")
+        return ojsonify([]), 500
 
 def get_current_week():
-    from models import BettingPeriod
-    from datetime import datetime
-    
-    period = db.session.query(BettingPeriod).filter_by(is_settled=False).order_by(BettingPeriod.week.desc()).first()
+    # Several helpers ask for the week within one request; resolve it once
+    if 'current_week' not in g:
+        g.current_week = _current_week()
+    return g.current_week
+
+@cache.memoize(timeout=30)
+def _current_week():
+    # Runs on nearly every request; fetch the bare column rather than a BettingPeriod instance
+    week = db.session.execute(
+        select(BettingPeriod.week).filter_by(is_settled=False).order_by(BettingPeriod.week.desc()).limit(1)
+    ).scalar()
     
-    if period:
-        return period.week
+    if week is not None:
+        return week
     
     return 10
 
 def check_betting_period_lock(week):
-    from models import BettingPeriod
-    from datetime import datetime
-    
-    period = db.session.query(BettingPeriod).filter_by(week=week).first()
+    period = db.session.execute(
+        select(BettingPeriod.is_locked, BettingPeriod.lock_time)
+        .where(BettingPeriod.week == week)
+        .limit(1)
+    ).first()
     
     if not period:
         return None
     
-    if period.is_locked or datetime.now(timezone.utc) >= period.lock_time:
-        if not period.is_locked:
-            period.is_locked = True
-            db.session.commit()
-        return period.lock_time
+    is_locked, lock_time = period
+    if is_locked or datetime.now(timezone.utc) >= lock_time:
+        return lock_time
+    
+    return None
+
+def lock_expired_periods():
+    """Persist is_locked for every period whose lock time has passed."""
+    return db.session.execute(
+        update(BettingPeriod)
+        .where(BettingPeriod.is_locked.is_(False),
+               BettingPeriod.lock_time <= datetime.now(timezone.utc))
+        .values(is_locked=True)
+    ).rowcount
+
+def upsert_insert(model):
+    """Dialect-specific INSERT construct that supports ON CONFLICT clauses."""
+    if db.engine.dialect.name == 'postgresql':
+        return pg_insert(model)
+    return sqlite_insert(model)
+
+def record_placed_bet(user, week, amount):
+    """Create or bump the user's WeeklyStats row for a new bet in one statement.
     
+    Expects `user.account_balance` to already have `amount` deducted.
+    """
+    stmt = upsert_insert(WeeklyStats).values(
+        user_id=user.id,
+        week=week,
+        starting_balance=user.account_balance + amount,
+        ending_balance=user.account_balance,
+        pnl=-amount,
+        active_bets_amount=amount,
+        settled_pnl=0.0,
+        bets_placed=1,
+        bets_won=0
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['user_id', 'week'],
+        set_={
+            'bets_placed': WeeklyStats.bets_placed + 1,
+            'active_bets_amount': WeeklyStats.active_bets_amount + amount,
+            'ending_balance': stmt.excluded.ending_balance,
+            'pnl': stmt.excluded.ending_balance - WeeklyStats.starting_balance
+        }
+    )
+    db.session.execute(stmt)
+
+def american_odds_value(odds):
+    """Signed value of American odds such as '+250' or '-120', or None if malformed."""
+    if isinstance(odds, str) and re.fullmatch(r'[+-]?[0-9]{1,6}', odds):
+        return int(odds) or None
     return None
 
+def odds_sort_value(odds):
+    """The value stored in Bet.odds_num: signed American odds, with 'EVEN' as 0."""
+    return 0 if odds == 'EVEN' else american_odds_value(odds)
+
+@functools.lru_cache(maxsize=512)
+def american_odds_multiplier(odds):
+    """Profit per unit staked for American odds such as '+250' or '-120'."""
+    odds_num = american_odds_value(odds)
+    return odds_num / 100 if odds_num > 0 else 100 / -odds_num
+
+class InvalidBet(Exception):
+    """A bet request that can't be placed; the message is shown to the user."""
+
+def _bet_int(data, key, message):
+    # JSON numbers or numeric strings only; bools are ints in Python but not here
+    value = data.get(key)
+    if isinstance(value, bool) or not isinstance(value, (int, str)):
+        raise InvalidBet(message)
+    try:
+        return int(value)
+    except ValueError:
+        raise InvalidBet(message)
+
+def _resolve_scorer_bet(label):
+    def resolve(data, week, amount):
+        owner = data.get('owner')
+        odds = data.get('odds')
+        
+        if not owner or not odds:
+            raise InvalidBet('Missing required data')
+        if not isinstance(owner, str):
+            raise InvalidBet('Invalid team')
+        if american_odds_value(odds) is None:
+            raise InvalidBet('Invalid odds')
+        
+        return f"{owner}: {label} {odds}", odds, amount * american_odds_multiplier(odds)
+    return resolve
+
+def _resolve_team_ou_bet(data, week, amount):
+    team_id = _bet_int(data, 'team_id', 'Invalid team')
+    choice = data.get('choice')
+    if choice not in ('over', 'under'):
+        raise InvalidBet('Invalid choice')
+    
+    cursor = get_sqlite_conn(ODDS_DB_PATH).cursor()
+    cursor.execute("""
+        SELECT owner, line FROM betting_odds_team_ou
+        WHERE week = ? AND team_id = ?
+        LIMIT 1
+    """, (week, team_id))
+    team_data = cursor.fetchone()
+    
+    if team_data is None:
+        raise InvalidBet('Invalid team')
+    
+    description = f"{team_data['owner']} O/U {team_data['line']:.1f}: {choice.capitalize()}"
+    return description, 'EVEN', amount
+
+def _resolve_moneyline_bet(data, week, amount):
+    matchup_idx = _bet_int(data, 'matchup_idx', 'Invalid matchup')
+    team = data.get('team')
+    
+    matchups = _week_matchups(week, sqlite_db_version(ODDS_DB_PATH, LEAGUE_DB_PATH))
+    if not 0 <= matchup_idx < len(matchups):
+        raise InvalidBet('Invalid matchup')
+    
+    matchup = matchups[matchup_idx]
+    team1_owner = matchup['team1_name']
+    team2_owner = matchup['team2_name']
+    matchup_display = f"{team1_owner} vs {team2_owner}"
+    
+    if team == 'team1':
+        team_name = team1_owner
+        odds = matchup['team1_ml']
+    elif team == 'team2':
+        team_name = team2_owner
+        odds = matchup['team2_ml']
+    else:
+        raise InvalidBet('Invalid team')
+    
+    return f"{matchup_display}: {team_name} {odds}", odds, amount * american_odds_multiplier(odds)
+
+# Each resolver validates the request and returns (description, odds, potential_win);
+# unknown bet types are treated as moneyline bets
+BET_RESOLVERS = {
+    'highest_scorer': _resolve_scorer_bet('Highest Scorer'),
+    'lowest_scorer': _resolve_scorer_bet('Lowest Scorer'),
+    'team_ou': _resolve_team_ou_bet,
+    'moneyline': _resolve_moneyline_bet,
+}
+
 @app.route('/api/place_bet', methods=['POST'])
 @require_login
 def place_bet():
-    from models import Bet, WeeklyStats
-    from datetime import datetime
-    
     data = request.get_json()
     bet_type = data.get('bet_type', 'moneyline')
     amount = float(data.get('amount', 0))
@@ -633,323 +988,139 @@ def place_bet():
     
     lock_time = check_betting_period_lock(week)
     if lock_time:
-        return jsonify({
+        return ojsonify({
             'success': False,
             'error': f'Bets are locked as of {lock_time.strftime("%Y-%m-%d %I:%M %p UTC")}'
         })
     
     if amount <= 0:
-        return jsonify({'success': False, 'error': 'Invalid bet amount'})
+        return ojsonify({'success': False, 'error': 'Invalid bet amount'})
+    
+    # Re-read the balance under a row lock (FOR UPDATE on PostgreSQL) so two
+    # concurrent bets can't both pass the balance check
+    db.session.execute(
+        select(User)
+        .where(User.id == current_user.id)
+        .with_for_update()
+        .execution_options(populate_existing=True)
+    ).scalar_one()
     
     if current_user.account_balance < amount:
-        return jsonify({'success': False, 'error': 'Insufficient balance'})
+        return ojsonify({'success': False, 'error': 'Insufficient balance'})
+    
+    # The balance change, bet insert and WeeklyStats upsert all go out in the
+    # single flush at commit instead of being autoflushed one by one
+    db.session.autoflush = False
+    
+    resolve = BET_RESOLVERS.get(bet_type)
+    if resolve is None:
+        bet_type, resolve = 'moneyline', _resolve_moneyline_bet
     
     try:
-        # Get or create WeeklyStats once for all bet types (optimization)
-        weekly_stat = db.session.query(WeeklyStats).filter_by(
-            user_id=current_user.id,
-            week=week
-        ).first()
-        
-        if not weekly_stat:
-            weekly_stat = WeeklyStats(
-                user_id=current_user.id,
-                week=week,
-                starting_balance=current_user.account_balance,
-                ending_balance=current_user.account_balance,
-                pnl=0.0,
-                active_bets_amount=0.0,
-                settled_pnl=0.0,
-                bets_placed=0,
-                bets_won=0
-            )
-            db.session.add(weekly_stat)
-        
-        # Handle highest scorer bets
-        if bet_type == 'highest_scorer':
-            owner = data.get('owner')
-            odds = data.get('odds')
-            
-            if not owner or not odds:
-                return jsonify({'success': False, 'error': 'Missing required data'})
-            
-            odds_num = int(odds.replace('+', ''))
-            if odds.startswith('+'):
-                potential_win = amount * (odds_num / 100)
-            else:
-                potential_win = amount * (100 / abs(odds_num))
-            
-            current_user.account_balance -= amount
-            description = f"{owner}: Highest Scorer {odds}"
-            
-            bet = Bet(
-                user_id=current_user.id,
-                bet_type='highest_scorer',
-                description=description,
-                week=week,
-                amount=amount,
-                odds=odds,
-                potential_win=potential_win,
-                status='pending',
-                created_at=datetime.now(timezone.utc)
-            )
-            
-            db.session.add(bet)
-            
-            weekly_stat.bets_placed += 1
-            weekly_stat.active_bets_amount += amount
-            weekly_stat.ending_balance = current_user.account_balance
-            weekly_stat.pnl = weekly_stat.ending_balance - weekly_stat.starting_balance
-            
-            db.session.commit()
-            
-            return jsonify({'success': True, 'new_balance': current_user.account_balance})
-        
-        # Handle lowest scorer bets
-        if bet_type == 'lowest_scorer':
-            owner = data.get('owner')
-            odds = data.get('odds')
-            
-            if not owner or not odds:
-                return jsonify({'success': False, 'error': 'Missing required data'})
-            
-            odds_num = int(odds.replace('+', ''))
-            if odds.startswith('+'):
-                potential_win = amount * (odds_num / 100)
-            else:
-                potential_win = amount * (100 / abs(odds_num))
-            
-            current_user.account_balance -= amount
-            description = f"{owner}: Lowest Scorer {odds}"
-            
-            bet = Bet(
-                user_id=current_user.id,
-                bet_type='lowest_scorer',
-                description=description,
-                week=week,
-                amount=amount,
-                odds=odds,
-                potential_win=potential_win,
-                status='pending',
-                created_at=datetime.now(timezone.utc)
-            )
-            
-            db.session.add(bet)
-            
-            weekly_stat.bets_placed += 1
-            weekly_stat.active_bets_amount += amount
-            weekly_stat.ending_balance = current_user.account_balance
-            weekly_stat.pnl = weekly_stat.ending_balance - weekly_stat.starting_balance
-            
-            db.session.commit()
-            
-            return jsonify({'success': True, 'new_balance': current_user.account_balance})
-        
-        # Handle team over/under bets
-        if bet_type == 'team_ou':
-            team_idx = data.get('team_idx')
-            choice = data.get('choice')
-            
-            conn = sqlite3.connect(ODDS_DB_PATH)
-            conn.row_factory = sqlite3.Row
-            cursor = conn.cursor()
-            cursor.execute("SELECT * FROM betting_odds_team_ou WHERE week = ? ORDER BY owner", (week,))
-            teams = cursor.fetchall()
-            conn.close()
-            
-            if team_idx >= len(teams):
-                return jsonify({'success': False, 'error': 'Invalid team'})
-            
-            team_data = teams[team_idx]
-            owner = team_data['owner']
-            line = team_data['line']
-            
-            potential_win = amount
-            current_user.account_balance -= amount
-            description = f"{owner} O/U {line:.1f}: {choice.capitalize()}"
-            
-            bet = Bet(
-                user_id=current_user.id,
-                bet_type='team_ou',
-                description=description,
-                week=week,
-                amount=amount,
-                odds='EVEN',
-                potential_win=potential_win,
-                status='pending',
-                created_at=datetime.now(timezone.utc)
-            )
-            
-            db.session.add(bet)
-            
-            weekly_stat.bets_placed += 1
-            weekly_stat.active_bets_amount += amount
-            weekly_stat.ending_balance = current_user.account_balance
-            weekly_stat.pnl = weekly_stat.ending_balance - weekly_stat.starting_balance
-            
-            db.session.commit()
-            
-            return jsonify({'success': True, 'new_balance': current_user.account_balance})
-        
-        # Handle moneyline bets
-        matchup_idx = data.get('matchup_idx')
-        team = data.get('team')
-        
-        league_conn = sqlite3.connect(LEAGUE_DB_PATH)
-        league_conn.row_factory = sqlite3.Row
-        league_cursor = league_conn.cursor()
-        league_cursor.execute("""
-            SELECT r.roster_id, u.display_name, u.username
-            FROM rosters r
-            LEFT JOIN users u ON r.owner_id = u.user_id
-        """)
-        team_mapping = {}
-        for row in league_cursor.fetchall():
-            owner_name = row['display_name'] or row['username'] or f"Team {row['roster_id']}"
-            team_mapping[row['roster_id']] = owner_name
-        league_conn.close()
-        
-        conn = sqlite3.connect(ODDS_DB_PATH)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM betting_odds_matchup_ml WHERE week = ? ORDER BY matchup", (week,))
-        matchups = cursor.fetchall()
-        conn.close()
-        
-        if matchup_idx >= len(matchups):
-            return jsonify({'success': False, 'error': 'Invalid matchup'})
-        
-        matchup = matchups[matchup_idx]
-        
-        team1_owner = team_mapping.get(matchup['team1_id'], f"Team {matchup['team1_id']}")
-        team2_owner = team_mapping.get(matchup['team2_id'], f"Team {matchup['team2_id']}")
-        matchup_display = f"{team1_owner} vs {team2_owner}"
-        
-        if team == 'team1':
-            team_name = team1_owner
-            odds = matchup['team1_ml']
-        elif team == 'team2':
-            team_name = team2_owner
-            odds = matchup['team2_ml']
-        else:
-            return jsonify({'success': False, 'error': 'Invalid team'})
-        
-        odds_num = int(odds)
-        if odds_num > 0:
-            potential_win = amount * (odds_num / 100)
-        else:
-            potential_win = amount * (100 / abs(odds_num))
+        description, odds, potential_win = resolve(data, week, amount)
         
         current_user.account_balance -= amount
-        description = f"{matchup_display}: {team_name} {odds}"
-
-        bet = Bet(
+        
+        # The new Bet is never read back here, so insert it as a plain
+        # statement instead of tracking an instance through the unit of work
+        db.session.execute(insert(Bet).values(
             user_id=current_user.id,
-            bet_type='moneyline',
+            bet_type=bet_type,
             description=description,
             week=week,
             amount=amount,
             odds=odds,
+            odds_num=odds_sort_value(odds),
             potential_win=potential_win,
-            status='pending',
-            created_at=datetime.now(timezone.utc)
-        )
-        
-        db.session.add(bet)
-        
-        weekly_stat.bets_placed += 1
-        weekly_stat.active_bets_amount += amount
-        weekly_stat.ending_balance = current_user.account_balance
-        weekly_stat.pnl = weekly_stat.ending_balance - weekly_stat.starting_balance
+            status='pending'
+        ))
+        record_placed_bet(current_user, week, amount)
         
         db.session.commit()
+        invalidate_user_cache(current_user.id)
         
-        return jsonify({'success': True, 'new_balance': current_user.account_balance})
+        return ojsonify({'success': True, 'new_balance': current_user.account_balance})
     
-    except Exception as e:
-        print(f"Error placing bet: {e}")
-        import traceback
-        traceback.print_exc()
+    except InvalidBet as e:
+        return ojsonify({'success': False, 'error': str(e)})
+    except Exception:
+        app.logger.exception("Error placing bet")
         db.session.rollback()
-        return jsonify({'success': False, 'error': str(e)})
+        return ojsonify({'success': False, 'error': 'Unable to place bet'})
 
 @app.route('/api/my_bets')
 @require_login
 def get_my_bets():
-    from models import Bet
-    
     try:
-        bets = db.session.query(Bet).filter_by(
-            user_id=current_user.id,
-            status='pending'
-        ).order_by(Bet.created_at.desc()).all()
-        
-        bets_data = []
-        for bet in bets:
-            bets_data.append({
-                'id': bet.id,
-                'description': bet.description,
-                'amount': bet.amount,
-                'odds': bet.odds,
-                'potential_win': bet.potential_win,
-                'status': bet.status,
-                'week': bet.week
-            })
-        
-        return jsonify(bets_data)
+        # Served by ix_bet_user_status_created; only the serialized columns are loaded
+        bets = db.session.execute(
+            select(Bet.id, Bet.description, Bet.amount, Bet.odds,
+                   Bet.potential_win, Bet.status, Bet.week)
+            .where(Bet.user_id == current_user.id, Bet.status == 'pending')
+            .order_by(Bet.created_at.desc())
+        ).mappings().all()
+        
+        return ojsonify(bets)
     
-    except Exception as e:
-        print(f"Error getting bets: {e}")
-        import traceback
-        traceback.print_exc()
-        return jsonify([])
+    except Exception:
+        app.logger.exception("Error getting bets")
+        return ojsonify([])
 
 @app.route('/api/remove_bet/<int:bet_id>', methods=['DELETE'])
 @require_login
 def remove_bet(bet_id):
-    from models import Bet, WeeklyStats
-    
     try:
-        bet = db.session.query(Bet).filter_by(
-            id=bet_id,
-            user_id=current_user.id,
-            status='pending'
-        ).first()
+        # Lock the bet, then the user, in the same order as settle_bet, so a
+        # settle running meanwhile either finishes first (and the bet is no
+        # longer pending) or waits for the refund to commit
+        bet = db.session.execute(
+            select(Bet)
+            .where(Bet.id == bet_id, Bet.user_id == current_user.id, Bet.status == 'pending')
+            .with_for_update()
+            .execution_options(populate_existing=True)
+        ).scalar_one_or_none()
         
         if not bet:
-            return jsonify({'success': False, 'error': 'Bet not found'})
+            return ojsonify({'success': False, 'error': 'Bet not found'})
         
         lock_time = check_betting_period_lock(bet.week)
         if lock_time:
-            return jsonify({
+            return ojsonify({
                 'success': False,
                 'error': f'Bets are locked as of {lock_time.strftime("%Y-%m-%d %I:%M %p UTC")}'
             })
         
-        current_user.account_balance += bet.amount
+        db.session.execute(
+            select(User)
+            .where(User.id == current_user.id)
+            .with_for_update()
+            .execution_options(populate_existing=True)
+        ).scalar_one()
         
-        weekly_stat = db.session.query(WeeklyStats).filter_by(
-            user_id=current_user.id,
-            week=bet.week
-        ).first()
+        db.session.autoflush = False
+        current_user.account_balance += bet.amount
         
-        if weekly_stat:
-            weekly_stat.bets_placed -= 1
-            weekly_stat.active_bets_amount -= bet.amount
-            weekly_stat.ending_balance = current_user.account_balance
-            weekly_stat.pnl = weekly_stat.ending_balance - weekly_stat.starting_balance
+        db.session.execute(
+            update(WeeklyStats)
+            .where(WeeklyStats.user_id == current_user.id, WeeklyStats.week == bet.week)
+            .values(
+                bets_placed=WeeklyStats.bets_placed - 1,
+                active_bets_amount=WeeklyStats.active_bets_amount - bet.amount,
+                ending_balance=current_user.account_balance,
+                pnl=current_user.account_balance - WeeklyStats.starting_balance
+            )
+        )
         
         db.session.delete(bet)
         db.session.commit()
+        invalidate_user_cache(current_user.id)
         
-        return jsonify({'success': True, 'new_balance': current_user.account_balance})
+        return ojsonify({'success': True, 'new_balance': current_user.account_balance})
     
     except Exception as e:
-        print(f"Error removing bet: {e}")
-        import traceback
-        traceback.print_exc()
+        app.logger.exception("Error removing bet")
         db.session.rollback()
-        return jsonify({'success': False, 'error': str(e)})
+        return ojsonify({'success': False, 'error': str(e)})
 
 @app.route('/static/<path:filename>')
 def serve_static(filename):
@@ -957,9 +1128,6 @@ def serve_static(filename):
 
 @app.route('/analytics-images/<path:filename>')
 def serve_analytics_image(filename):
-    from werkzeug.security import safe_join
-    import os
-    
     images_dir = 'backend/data/images'
     safe_path = safe_join(images_dir, filename)
     
@@ -972,123 +1140,178 @@ def serve_analytics_image(filename):
 @app.route('/api/session-check')
 def check_session():
     if current_user.is_authenticated:
-        return jsonify({'authenticated': True, 'username': current_user.username})
-    return jsonify({'authenticated': False}), 401
+        return ojsonify({'authenticated': True, 'username': current_user.username})
+    return ojsonify({'authenticated': False}), 401
+
+@cache.memoize(timeout=60)
+def _teams_payload(data_version=None):
+    """Return the serialized team list and its ETag."""
+    conn = get_sqlite_conn(LEAGUE_DB_PATH)
+    cursor = conn.cursor()
+    
+    cursor.execute("""
+        SELECT r.roster_id, u.username, u.display_name
+        FROM rosters r
+        LEFT JOIN users u ON r.owner_id = u.user_id
+        ORDER BY r.roster_id
+    """)
+    
+    teams = []
+    for row in cursor.fetchall():
+        username = row['username']
+        display_name = row['display_name']
+        roster_id = row['roster_id']
+        
+        label = display_name or username or f"Team {roster_id}"
+        slug = username or display_name
+        
+        if slug:
+            teams.append({
+                'label': label,
+                'slug': slug,
+                'roster_id': roster_id
+            })
+    
+    body = orjson.dumps({'teams': teams})
+    return body, hashlib.md5(body).hexdigest()
 
 @app.route('/api/teams')
 @require_login
 def get_teams():
     try:
-        conn = sqlite3.connect(LEAGUE_DB_PATH)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            SELECT r.roster_id, u.username, u.display_name
+        body, etag = _teams_payload(sqlite_db_version(LEAGUE_DB_PATH))
+    except Exception:
+        app.logger.exception("Error getting teams")
+        return ojsonify({'teams': []})
+    
+    if etag in request.if_none_match:
+        response = app.response_class(status=304)
+    else:
+        response = app.response_class(body, mimetype='application/json')
+    response.set_etag(etag)
+    return response
+
+@functools.lru_cache(maxsize=256)
+def _compute_team_players(team_owner, week, data_version=None):
+    """Return (starters, bench) for a team, or None if the team is unknown.
+    
+    Players are tuples of (key, value) pairs so the cached result can't be
+    mutated by callers. `week` and `data_version` are only part of the cache
+    key, so cached rosters roll over with the betting period and whenever
+    league.db is rebuilt.
+    """
+    league_conn = get_sqlite_conn(LEAGUE_DB_PATH)
+    league_cursor = league_conn.cursor()
+    league_cursor.row_factory = None
+    
+    # Resolve the roster and fetch its players in one statement. A team
+    # with no projected players still yields one row with NULL player
+    # columns, so "no rows" means the team itself wasn't found.
+    league_cursor.execute("""
+        SELECT p.roster_id, p.first_name, p.last_name, p.position, p.mu, p.var, p.starting_status
+        FROM (
+            SELECT r.roster_id
             FROM rosters r
             LEFT JOIN users u ON r.owner_id = u.user_id
-            ORDER BY r.roster_id
-        """)
+            WHERE u.username = ?1 OR u.display_name = ?1
+            LIMIT 1
+        ) r
+        LEFT JOIN projections_rosters p ON p.roster_id = r.roster_id
+        ORDER BY 
+            CASE p.position
+                WHEN 'QB' THEN 1
+                WHEN 'RB' THEN 2
+                WHEN 'WR' THEN 3
+                WHEN 'TE' THEN 4
+                WHEN 'K' THEN 5
+                WHEN 'DEF' THEN 6
+                ELSE 7
+            END,
+            p.mu DESC
+    """, (team_owner,))
+    
+    rows = league_cursor.fetchall()
+    if not rows:
+        return None
+    
+    starters = []
+    bench = []
+    
+    for roster_id, first_name, last_name, position, mu, var, starting_status in rows:
+        if roster_id is None:
+            continue
+        
+        player_data = (
+            ('player_first_name', first_name or ''),
+            ('player_last_name', last_name or ''),
+            ('position', position),
+            ('mu', float(mu) if mu is not None else None),
+            ('var', float(var) if var is not None else None)
+        )
         
-        teams = []
-        for row in cursor.fetchall():
-            username = row['username']
-            display_name = row['display_name']
-            roster_id = row['roster_id']
-            
-            label = display_name or username or f"Team {roster_id}"
-            slug = username or display_name
-            
-            if slug:
-                teams.append({
-                    'label': label,
-                    'slug': slug,
-                    'roster_id': roster_id
-                })
-        
-        conn.close()
-        return jsonify({'teams': teams})
-    except Exception as e:
-        print(f"Error getting teams: {e}")
-        import traceback
-        traceback.print_exc()
-        return jsonify({'teams': []})
+        if starting_status and str(starting_status).strip():
+            starters.append(player_data)
+        else:
+            bench.append(player_data)
+    
+    bench.sort(key=lambda x: (
+        {'QB': 1, 'RB': 2, 'WR': 3, 'TE': 4, 'K': 5, 'DEF': 6}.get(x[2][1], 7),
+        -(x[3][1] if x[3][1] is not None else 0)
+    ))
+    
+    return tuple(starters), tuple(bench)
+
+def team_players_cache_key():
+    return f"team_players:{get_current_week()}:{request.args.get('team')}:{sqlite_db_version(LEAGUE_DB_PATH)}"
+
+def conditional_on(key_func, max_age=60):
+    """Answer If-None-Match with 304 while `key_func()` is unchanged.
+    
+    The ETag is derived from the cache key alone, so a matching request
+    skips the view (and its cache lookup) entirely.
+    """
+    def decorator(f):
+        @functools.wraps(f)
+        def wrapper(*args, **kwargs):
+            etag = hashlib.md5(key_func().encode()).hexdigest()
+            if etag in request.if_none_match:
+                response = app.response_class(status=304)
+            else:
+                response = app.make_response(f(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag)
+            response.cache_control.private = True
+            response.cache_control.max_age = max_age
+            return response
+        return wrapper
+    return decorator
 
 @app.route('/api/team_players')
 @require_login
+@conditional_on(team_players_cache_key)
+@cache.cached(timeout=120, key_prefix=team_players_cache_key, response_filter=cacheable_response)
 def get_team_players():
     team_owner = request.args.get('team')
     if not team_owner:
-        return jsonify({'error': 'Team parameter required'}), 400
+        return ojsonify({'error': 'Team parameter required'}), 400
     
     try:
-        league_conn = sqlite3.connect(LEAGUE_DB_PATH)
-        league_conn.row_factory = sqlite3.Row
-        league_cursor = league_conn.cursor()
-        
-        league_cursor.execute("""
-            SELECT r.roster_id, r.starters, r.players
-            FROM rosters r
-            LEFT JOIN users u ON r.owner_id = u.user_id
-            WHERE u.username = ? OR u.display_name = ?
-        """, (team_owner, team_owner))
-        
-        roster = league_cursor.fetchone()
-        if not roster:
-            league_conn.close()
-            return jsonify({'error': 'Team not found'}), 404
-        
-        roster_id = roster['roster_id']
-        team_name = f"Team {roster_id}"
-        
-        league_cursor.execute("""
-            SELECT sleeper_player_id, first_name, last_name, position, mu, var, starting_status
-            FROM projections_rosters
-            WHERE roster_id = ?
-            ORDER BY 
-                CASE position
-                    WHEN 'QB' THEN 1
-                    WHEN 'RB' THEN 2
-                    WHEN 'WR' THEN 3
-                    WHEN 'TE' THEN 4
-                    WHEN 'K' THEN 5
-                    WHEN 'DEF' THEN 6
-                    ELSE 7
-                END,
-                mu DESC
-        """, (roster_id,))
-        
-        starters = []
-        bench = []
-        
-        for row in league_cursor.fetchall():
-            player_data = {
-                'player_first_name': row['first_name'] or '',
-                'player_last_name': row['last_name'] or '',
-                'position': row['position'],
-                'mu': float(row['mu']) if row['mu'] is not None else None,
-                'var': float(row['var']) if row['var'] is not None else None
-            }
-            
-            if row['starting_status'] and str(row['starting_status']).strip():
-                starters.append(player_data)
-            else:
-                bench.append(player_data)
-        
-        league_conn.close()
+        result = _compute_team_players(team_owner, get_current_week(), sqlite_db_version(LEAGUE_DB_PATH))
+        if result is None:
+            return ojsonify({'error': 'Team not found'}), 404
         
-        bench.sort(key=lambda x: (
-            {'QB': 1, 'RB': 2, 'WR': 3, 'TE': 4, 'K': 5, 'DEF': 6}.get(x['position'], 7),
-            -(x['mu'] if x['mu'] is not None else 0)
-        ))
+        starters, bench = result
         
-        return jsonify({'starters': starters, 'bench': bench})
+        return ojsonify({
+            'starters': [dict(p) for p in starters],
+            'bench': [dict(p) for p in bench]
+        })
         
-    except Exception as e:
-        print(f"Error getting team players: {e}")
-        import traceback
-        traceback.print_exc()
-        return jsonify({'starters': [], 'bench': []})
+    except Exception:
+        app.logger.exception("Error getting team players")
+        # Not a 200, so neither the ETag nor the response cache keeps it
+        return ojsonify({'starters': [], 'bench': []}), 500
 
 @app.route('/admin')
 @admin_required
@@ -1098,227 +1321,335 @@ def admin():
 @app.route('/api/admin/betting_periods', methods=['GET'])
 @admin_required
 def get_betting_periods():
-    from models import BettingPeriod
-    
     try:
-        periods = db.session.query(BettingPeriod).order_by(BettingPeriod.week.desc()).all()
+        # Bet placement only reads the lock, so flip the stored flags here
+        # where they're actually displayed
+        if lock_expired_periods():
+            db.session.commit()
+        
+        periods = db.session.execute(
+            select(BettingPeriod.id, BettingPeriod.week, BettingPeriod.lock_time,
+                   BettingPeriod.is_locked, BettingPeriod.is_settled)
+            .order_by(BettingPeriod.week.desc())
+        ).all()
         
         periods_data = []
-        for period in periods:
+        for period_id, week, lock_time, is_locked, is_settled in periods:
             periods_data.append({
-                'id': period.id,
-                'week': period.week,
-                'lock_time': period.lock_time.strftime('%Y-%m-%d %I:%M %p UTC'),
-                'is_locked': period.is_locked,
-                'is_settled': period.is_settled
+                'id': period_id,
+                'week': week,
+                'lock_time': lock_time.strftime('%Y-%m-%d %I:%M %p UTC'),
+                'is_locked': is_locked,
+                'is_settled': is_settled
             })
         
-        return jsonify(periods_data)
-    except Exception as e:
-        print(f"Error getting betting periods: {e}")
-        import traceback
-        traceback.print_exc()
-        return jsonify([])
+        return ojsonify(periods_data)
+    except Exception:
+        app.logger.exception("Error getting betting periods")
+        return ojsonify([])
 
 @app.route('/api/admin/set_betting_period', methods=['POST'])
 @admin_required
 def set_betting_period():
-    from models import BettingPeriod
-    from datetime import datetime
-    
     data = request.get_json()
     week = data.get('week')
     lock_time_str = data.get('lock_time')
     
     if not week or not lock_time_str:
-        return jsonify({'success': False, 'error': 'Week and lock time required'})
+        return ojsonify({'success': False, 'error': 'Week and lock time required'})
     
     try:
         # Parse as naive datetime and convert to UTC
         lock_time = datetime.strptime(lock_time_str, '%Y-%m-%dT%H:%M').replace(tzinfo=timezone.utc)
         
-        period = db.session.query(BettingPeriod).filter_by(week=week).first()
-        
-        if period:
-            period.lock_time = lock_time
-            period.is_locked = False
-        else:
-            period = BettingPeriod(week=week, lock_time=lock_time, is_locked=False, is_settled=False)
-            db.session.add(period)
-        
+        stmt = upsert_insert(BettingPeriod).values(
+            week=week,
+            lock_time=lock_time,
+            is_locked=False,
+            is_settled=False
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['week'],
+            set_={
+                'lock_time': stmt.excluded.lock_time,
+                'is_locked': False,
+                'updated_at': datetime.now(timezone.utc)
+            }
+        )
+        db.session.execute(stmt)
         db.session.commit()
+        cache.delete_memoized(_current_week)
         
-        return jsonify({'success': True})
+        return ojsonify({'success': True})
     except Exception as e:
-        print(f"Error setting betting period: {e}")
-        import traceback
-        traceback.print_exc()
+        app.logger.exception("Error setting betting period")
         db.session.rollback()
-        return jsonify({'success': False, 'error': str(e)})
+        return ojsonify({'success': False, 'error': str(e)})
 
 @app.route('/api/admin/pending_bets', methods=['GET'])
 @admin_required
 def get_pending_bets():
-    from models import Bet
-    
     week = request.args.get('week', 10, type=int)
     
     try:
-        bets = db.session.query(Bet).filter_by(week=week, status='pending').all()
-        
-        bets_data = []
-        for bet in bets:
-            bets_data.append({
-                'id': bet.id,
-                'user_id': bet.user_id,
-                'description': bet.description,
-                'amount': bet.amount,
-                'odds': bet.odds,
-                'potential_win': bet.potential_win,
-                'bet_type': bet.bet_type
-            })
-        
-        return jsonify(bets_data)
-    except Exception as e:
-        print(f"Error getting pending bets: {e}")
-        import traceback
-        traceback.print_exc()
-        return jsonify([])
+        bets = db.session.execute(
+            select(Bet.id, Bet.user_id, Bet.description, Bet.amount,
+                   Bet.odds, Bet.potential_win, Bet.bet_type)
+            .filter_by(week=week, status='pending')
+        ).mappings().all()
+        
+        return ojsonify(bets)
+    except Exception:
+        app.logger.exception("Error getting pending bets")
+        return ojsonify([])
+
+def apply_bet_outcome(bet, won):
+    """Mark a pending bet won or lost and return the amount paid back to the user."""
+    if won:
+        payout = bet.amount + bet.potential_win
+        bet.result = bet.potential_win
+        bet.status = 'won'
+    else:
+        payout = 0
+        bet.result = -bet.amount
+        bet.status = 'lost'
+    
+    bet.settled_at = datetime.now(timezone.utc)
+    return payout
 
 @app.route('/api/admin/settle_bet', methods=['POST'])
 @admin_required
 def settle_bet():
-    from models import Bet, WeeklyStats, User
-    from datetime import datetime
-    
     data = request.get_json()
     bet_id = data.get('bet_id')
     won = data.get('won', False)
     
     if not bet_id:
-        return jsonify({'success': False, 'error': 'Bet ID required'})
+        return ojsonify({'success': False, 'error': 'Bet ID required'})
     
     try:
-        bet = db.session.query(Bet).filter_by(id=bet_id).first()
+        # Lock the bet row so concurrent settle clicks can't both pay out
+        bet = db.session.execute(
+            select(Bet)
+            .where(Bet.id == bet_id)
+            .with_for_update()
+            .execution_options(populate_existing=True)
+        ).scalar_one_or_none()
         
         if not bet:
-            return jsonify({'success': False, 'error': 'Bet not found'})
+            return ojsonify({'success': False, 'error': 'Bet not found'})
         
         if bet.status != 'pending':
-            return jsonify({'success': False, 'error': 'Bet already settled'})
-        
-        user = db.session.query(User).filter_by(id=bet.user_id).first()
-        
-        if not user:
-            return jsonify({'success': False, 'error': 'User not found'})
-        
+            return ojsonify({'success': False, 'error': 'Bet already settled'})
+        
+        payout = apply_bet_outcome(bet, won)
+        
+        # Adjust the balance in SQL rather than read-modify-write, so a bet
+        # the user places meanwhile can't be overwritten
+        new_balance = db.session.execute(
+            update(User)
+            .where(User.id == bet.user_id)
+            .values(
+                account_balance=User.account_balance + payout,
+                total_pnl=User.total_pnl + bet.result
+            )
+            .returning(User.account_balance)
+        ).scalar_one_or_none()
+        
+        if new_balance is None:
+            db.session.rollback()
+            return ojsonify({'success': False, 'error': 'User not found'})
+        
+        weekly_values = {
+            'active_bets_amount': WeeklyStats.active_bets_amount - bet.amount,
+            'settled_pnl': WeeklyStats.settled_pnl + bet.result,
+            'ending_balance': new_balance,
+            'pnl': new_balance - WeeklyStats.starting_balance,
+        }
         if won:
-            payout = bet.amount + bet.potential_win
-            bet.result = bet.potential_win
-            bet.status = 'won'
-        else:
-            payout = 0
-            bet.result = -bet.amount
-            bet.status = 'lost'
-        
-        user.account_balance += payout
-        user.total_pnl += bet.result
+            weekly_values['bets_won'] = WeeklyStats.bets_won + 1
         
-        bet.settled_at = datetime.now(timezone.utc)
+        db.session.execute(
+            update(WeeklyStats)
+            .where(WeeklyStats.user_id == bet.user_id, WeeklyStats.week == bet.week)
+            .values(**weekly_values)
+        )
         
-        weekly_stat = db.session.query(WeeklyStats).filter_by(
-            user_id=bet.user_id,
-            week=bet.week
-        ).first()
+        db.session.commit()
+        invalidate_user_cache(bet.user_id)
+        cache.delete_memoized(_leaderboard_ctx)
         
-        if weekly_stat:
-            weekly_stat.active_bets_amount -= bet.amount
-            weekly_stat.settled_pnl += bet.result
-            weekly_stat.ending_balance = user.account_balance
-            weekly_stat.pnl = weekly_stat.ending_balance - weekly_stat.starting_balance
-            if won:
-                weekly_stat.bets_won += 1
+        return ojsonify({'success': True})
+    except Exception as e:
+        app.logger.exception("Error settling bet")
+        db.session.rollback()
+        return ojsonify({'success': False, 'error': str(e)})
+
+@app.route('/api/admin/settle_bets', methods=['POST'])
+@admin_required
+def settle_bets():
+    """Settle many bets in one transaction; expects {'bets': [{'bet_id', 'won'}, ...]}."""
+    data = request.get_json(silent=True)
+    items = data.get('bets') if isinstance(data, dict) else None
+    
+    # Malformed entries are reported back in 'skipped' rather than failing the batch
+    outcomes = {}
+    invalid = []
+    for item in items if isinstance(items, list) else []:
+        bet_id = item.get('bet_id') if isinstance(item, dict) else None
+        won = item.get('won', False) if isinstance(item, dict) else None
+        if isinstance(bet_id, bool) or not isinstance(bet_id, (int, str)) or not isinstance(won, bool):
+            invalid.append(item)
+            continue
+        try:
+            outcomes[int(bet_id)] = won
+        except ValueError:
+            invalid.append(item)
+    
+    if not outcomes:
+        return ojsonify({'success': False, 'error': 'Bet IDs required'})
+    
+    try:
+        bets = db.session.execute(
+            select(Bet)
+            .where(Bet.id.in_(list(outcomes)), Bet.status == 'pending')
+            .order_by(Bet.id)
+            .with_for_update()
+            .execution_options(populate_existing=True)
+        ).scalars().all()
+        
+        # Net the changes per user and per (user, week) so each row is
+        # updated once however many of its bets are in the batch
+        user_deltas = {}
+        weekly_deltas = {}
+        for bet in bets:
+            won = outcomes[bet.id]
+            payout = apply_bet_outcome(bet, won)
+            
+            balance, pnl = user_deltas.get(bet.user_id, (0, 0))
+            user_deltas[bet.user_id] = (balance + payout, pnl + bet.result)
+            
+            active, settled, bets_won = weekly_deltas.get((bet.user_id, bet.week), (0, 0, 0))
+            weekly_deltas[(bet.user_id, bet.week)] = (active + bet.amount, settled + bet.result, bets_won + won)
+        
+        balances = {}
+        for user_id, (payout, pnl) in user_deltas.items():
+            balances[user_id] = db.session.execute(
+                update(User)
+                .where(User.id == user_id)
+                .values(
+                    account_balance=User.account_balance + payout,
+                    total_pnl=User.total_pnl + pnl
+                )
+                .returning(User.account_balance)
+            ).scalar_one()
+        
+        for (user_id, week), (active, settled, bets_won) in weekly_deltas.items():
+            db.session.execute(
+                update(WeeklyStats)
+                .where(WeeklyStats.user_id == user_id, WeeklyStats.week == week)
+                .values(
+                    active_bets_amount=WeeklyStats.active_bets_amount - active,
+                    settled_pnl=WeeklyStats.settled_pnl + settled,
+                    ending_balance=balances[user_id],
+                    pnl=balances[user_id] - WeeklyStats.starting_balance,
+                    bets_won=WeeklyStats.bets_won + bets_won
+                )
+            )
         
         db.session.commit()
-        
-        return jsonify({'success': True})
+        for user_id in user_deltas:
+            invalidate_user_cache(user_id)
+        cache.delete_memoized(_leaderboard_ctx)
+        
+        settled_ids = [bet.id for bet in bets]
+        return ojsonify({
+            'success': True,
+            'settled': settled_ids,
+            'skipped': invalid + sorted(set(outcomes) - set(settled_ids))
+        })
     except Exception as e:
-        print(f"Error settling bet: {e}")
-        import traceback
-        traceback.print_exc()
+        app.logger.exception("Error settling bets")
         db.session.rollback()
-        return jsonify({'success': False, 'error': str(e)})
+        return ojsonify({'success': False, 'error': str(e)})
 
 @app.route('/api/admin/settle_week', methods=['POST'])
 @admin_required
 def settle_week():
-    from models import BettingPeriod
-    
     data = request.get_json()
     week = data.get('week')
     
     if not week:
-        return jsonify({'success': False, 'error': 'Week required'})
+        return ojsonify({'success': False, 'error': 'Week required'})
     
     try:
-        period = db.session.query(BettingPeriod).filter_by(week=week).first()
-        
-        if not period:
-            return jsonify({'success': False, 'error': 'Betting period not found'})
+        updated = db.session.execute(
+            update(BettingPeriod)
+            .where(BettingPeriod.week == week)
+            .values(is_settled=True)
+        ).rowcount
         
-        period.is_settled = True
+        if not updated:
+            return ojsonify({'success': False, 'error': 'Betting period not found'})
         
         db.session.commit()
+        cache.delete_memoized(_current_week)
         
-        return jsonify({'success': True})
+        return ojsonify({'success': True})
     except Exception as e:
-        print(f"Error settling week: {e}")
-        import traceback
-        traceback.print_exc()
+        app.logger.exception("Error settling week")
         db.session.rollback()
-        return jsonify({'success': False, 'error': str(e)})
+        return ojsonify({'success': False, 'error': str(e)})
 
 @app.route('/api/admin/unlock_period', methods=['POST'])
 @admin_required
 def unlock_period():
-    from models import BettingPeriod
-    
     data = request.get_json()
     week = data.get('week')
     
-    print(f"[UNLOCK] Request received for week: {week}")
-    print(f"[UNLOCK] Request data: {data}")
-    print(f"[UNLOCK] Current user: {current_user.email if current_user.is_authenticated else 'Not authenticated'}")
-    print(f"[UNLOCK] Is admin: {getattr(current_user, 'is_admin', False)}")
-    
     if not week:
-        print("[UNLOCK] Error: Week not provided")
-        return jsonify({'success': False, 'error': 'Week required'})
+        return ojsonify({'success': False, 'error': 'Week required'})
     
     try:
-        period = db.session.query(BettingPeriod).filter_by(week=week).first()
-        
-        if not period:
-            print(f"[UNLOCK] Error: Betting period not found for week {week}")
-            return jsonify({'success': False, 'error': 'Betting period not found'})
-        
-        print(f"[UNLOCK] Found period: week={period.week}, is_locked={period.is_locked}, is_settled={period.is_settled}, lock_time={period.lock_time}")
-        
-        period.is_locked = False
         new_lock_time = datetime.now(timezone.utc) + timedelta(days=7)
-        period.lock_time = new_lock_time
+        updated = db.session.execute(
+            update(BettingPeriod)
+            .where(BettingPeriod.week == week)
+            .values(is_locked=False, lock_time=new_lock_time)
+        ).rowcount
+        
+        if not updated:
+            app.logger.warning("Unlock requested for week %s with no betting period", week)
+            return ojsonify({'success': False, 'error': 'Betting period not found'})
         
         db.session.commit()
         
-        print(f"[UNLOCK] Successfully unlocked week {week}, new lock_time set to {new_lock_time}")
+        app.logger.info("Unlocked week %s, new lock_time %s", week, new_lock_time)
         
-        return jsonify({'success': True})
+        return ojsonify({'success': True})
     except Exception as e:
-        print(f"[UNLOCK] Error unlocking period: {e}")
-        import traceback
-        traceback.print_exc()
+        app.logger.exception("Error unlocking period")
         db.session.rollback()
-        return jsonify({'success': False, 'error': str(e)})
+        return ojsonify({'success': False, 'error': str(e)})
+
+def warm_caches():
+    """Fill the shared odds/team caches before serving.
+    
+    With gunicorn's preload_app this runs once in the master, and every
+    worker forks with the current week's matchups and team list already cached.
+    """
+    try:
+        week = _current_week.uncached()
+        _week_matchups(week, sqlite_db_version(ODDS_DB_PATH, LEAGUE_DB_PATH))
+        _teams_payload(sqlite_db_version(LEAGUE_DB_PATH))
+    except Exception:
+        app.logger.exception("Error warming caches")
+    finally:
+        # SQLite handles must not be carried across fork()
+        close_sqlite_conns()
+
+with app.app_context():
+    warm_caches()
 
 if __name__ == '__main__':
     debug_mode = os.getenv('FLASK_DEBUG', 'false').lower() == 'true'
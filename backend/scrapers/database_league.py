@@ -1,8 +1,15 @@
+import json
 import sqlite3
 from datetime import datetime
 from typing import Optional, List, Dict
 import os
 
+
+def _json_list(value):
+    """Serialize a Sleeper id list as JSON; anything else keeps its old repr."""
+    return json.dumps(value) if isinstance(value, list) else str(value)
+
+
 class LeagueDB:
     """SQLite database for Sleeper fantasy league data."""
     
@@ -12,6 +19,7 @@ class LeagueDB:
         self.conn = sqlite3.connect(db_path)
         self.conn.row_factory = sqlite3.Row  # Return rows as dictionaries
         self.create_tables()
+        self.migrate_list_columns()
     
     def create_tables(self):
         """Create all league-related tables."""
@@ -256,6 +264,8 @@ class LeagueDB:
         # Create indexes for faster queries
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_rosters_league ON rosters(league_id)")
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_rosters_owner ON rosters(owner_id)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_users_username ON users(username)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_users_display_name ON users(display_name)")
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_matchups_league_week ON matchups(league_id, week)")
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_matchups_roster ON matchups(roster_id)")
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_players_team ON nfl_players(team)")
@@ -266,9 +276,23 @@ class LeagueDB:
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_stats_player_week ON player_stats(player_id, week)")
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_stats_season_week ON player_stats(season, week)")
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_transactions_league ON transactions(league_id)")
-        
+
         self.conn.commit()
-    
+
+    def migrate_list_columns(self):
+        """Rewrite id lists stored as Python reprs (['1', '2']) as JSON."""
+        cursor = self.conn.cursor()
+
+        for table, columns in (('rosters', ('starters', 'players', 'reserve', 'taxi')),
+                               ('matchups', ('starters', 'players'))):
+            for column in columns:
+                cursor.execute(f"""
+                    UPDATE {table} SET {column} = replace({column}, '''', '"')
+                    WHERE {column} LIKE '[%' AND NOT json_valid({column})
+                """)
+
+        self.conn.commit()
+
     # ==================== League Methods ====================
     
     def insert_league(self, league_data: Dict):
@@ -427,10 +451,10 @@ class LeagueDB:
             roster_data.get('owner_id'),
             str(roster_data.get('co_owners')),
             roster_data.get('metadata', {}).get('team_name'),
-            str(roster_data.get('starters')),
-            str(roster_data.get('players')),
-            str(roster_data.get('reserve')),
-            str(roster_data.get('taxi')),
+            _json_list(roster_data.get('starters')),
+            _json_list(roster_data.get('players')),
+            _json_list(roster_data.get('reserve')),
+            _json_list(roster_data.get('taxi')),
             str(roster_data.get('settings')),
             str(roster_data.get('metadata')),
             roster_data.get('settings', {}).get('wins', 0),
@@ -454,8 +478,8 @@ class LeagueDB:
         data = [
             (
                 r['roster_id'], league_id, r.get('owner_id'), str(r.get('co_owners')),
-                r.get('metadata', {}).get('team_name'), str(r.get('starters')), str(r.get('players')),
-                str(r.get('reserve')), str(r.get('taxi')), str(r.get('settings')), str(r.get('metadata')),
+                r.get('metadata', {}).get('team_name'), _json_list(r.get('starters')), _json_list(r.get('players')),
+                _json_list(r.get('reserve')), _json_list(r.get('taxi')), str(r.get('settings')), str(r.get('metadata')),
                 r.get('settings', {}).get('wins', 0), r.get('settings', {}).get('losses', 0),
                 r.get('settings', {}).get('ties', 0), r.get('settings', {}).get('fpts', 0),
                 r.get('settings', {}).get('fpts_against', 0), r.get('settings', {}).get('fpts_decimal', 0),
@@ -548,8 +572,8 @@ class LeagueDB:
             week,
             matchup_data['roster_id'],
             matchup_data.get('matchup_id'),
-            str(matchup_data.get('starters')),
-            str(matchup_data.get('players')),
+            _json_list(matchup_data.get('starters')),
+            _json_list(matchup_data.get('players')),
             matchup_data.get('points', 0),
             matchup_data.get('custom_points'),
             str(matchup_data.get('players_points'))
@@ -568,8 +592,8 @@ class LeagueDB:
                 week,
                 m['roster_id'],
                 m.get('matchup_id'),
-                str(m.get('starters')),
-                str(m.get('players')),
+                _json_list(m.get('starters')),
+                _json_list(m.get('players')),
                 m.get('points', 0),
                 m.get('custom_points'),
                 str(m.get('players_points'))
@@ -0,0 +1,27 @@
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+
+# cpu_count() reports the host's CPUs inside a container, so size from the
+# environment instead; every worker holds its own Postgres pool
+workers = int(os.environ.get('WEB_CONCURRENCY', 2))
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+
+# Import the app (and run db.create_all / schema migrations) once in the
+# master, then fork workers from it
+preload_app = True
+
+timeout = 60
+accesslog = '-'
+errorlog = '-'
+
+
+def post_fork(server, worker):
+    # Connections opened in the master during startup must not be shared
+    # across processes; give each worker a fresh SQLAlchemy pool
+    from app import app
+    from database import db
+
+    with app.app_context():
+        db.engine.dispose(close=False)
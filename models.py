@@ -1,7 +1,7 @@
 from datetime import datetime, timezone
 from flask_login import UserMixin
 from flask_dance.consumer.storage.sqla import OAuthConsumerMixin
-from sqlalchemy import UniqueConstraint
+from sqlalchemy import Index, UniqueConstraint
 from database import db
 
 def utc_now():
@@ -48,6 +48,8 @@ class Bet(db.Model):
     description = db.Column(db.Text, nullable=False)
     amount = db.Column(db.Float, nullable=False)
     odds = db.Column(db.String, nullable=False)
+    # Signed integer form of `odds` ('EVEN' -> 0) for sorting
+    odds_num = db.Column(db.Integer)
     potential_win = db.Column(db.Float, nullable=False)
     status = db.Column(db.String, default='pending')
     result = db.Column(db.Float, default=0.0)
@@ -55,7 +57,16 @@ class Bet(db.Model):
     created_at = db.Column(db.DateTime(timezone=True), default=utc_now)
     settled_at = db.Column(db.DateTime(timezone=True), nullable=True)
     
-    user = db.relationship(User, backref='bets')
+    # Bet/WeeklyStats relationships refuse to lazy-load, so a per-row query
+    # hidden in a loop or template fails loudly instead of running N times
+    user = db.relationship(User, backref=db.backref('bets', lazy='raise_on_sql'), lazy='raise_on_sql')
+    
+    __table_args__ = (
+        Index('ix_bet_user_created', 'user_id', created_at.desc()),
+        Index('ix_bet_user_status_created', 'user_id', 'status', created_at.desc()),
+        Index('ix_bet_week_status', 'week', 'status'),
+        Index('ix_bet_status_odds_num', 'status', 'odds_num'),
+    )
 
 class WeeklyStats(db.Model):
     __tablename__ = 'weekly_stats'
@@ -72,9 +83,12 @@ class WeeklyStats(db.Model):
     bets_won = db.Column(db.Integer, default=0)
     created_at = db.Column(db.DateTime(timezone=True), default=utc_now)
     
-    user = db.relationship(User, backref='weekly_stats')
+    user = db.relationship(User, backref=db.backref('weekly_stats', lazy='raise_on_sql'), lazy='raise_on_sql')
     
-    __table_args__ = (UniqueConstraint('user_id', 'week', name='uq_user_week'),)
+    __table_args__ = (
+        UniqueConstraint('user_id', 'week', name='uq_user_week'),
+        Index('ix_weekly_stats_week_settled_pnl', 'week', 'settled_pnl'),
+    )
 
 class BettingPeriod(db.Model):
     __tablename__ = 'betting_periods'
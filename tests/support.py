@@ -0,0 +1,72 @@
+"""Shared setup for the app tests.
+
+The SQLite data files are opened by relative path, so the app is imported
+from a scratch copy of backend/data with a throwaway DATABASE_URL; importing
+it never touches the tracked databases or a real Postgres instance.
+
+Run from the repository root with ``python -m unittest discover -s tests -t .``
+"""
+import os
+import shutil
+import sys
+import tempfile
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_app = None
+
+
+def get_app():
+    global _app
+    if _app is None:
+        workdir = tempfile.mkdtemp(prefix='tnc-tests-')
+        shutil.copytree(os.path.join(REPO_ROOT, 'backend', 'data', 'databases'),
+                        os.path.join(workdir, 'backend', 'data', 'databases'))
+        os.chdir(workdir)
+        os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(workdir, 'app.db')
+        os.environ.setdefault('REPL_ID', 'tests')
+        sys.path.insert(0, REPO_ROOT)
+        
+        import app as app_module
+        _app = app_module
+    return _app
+
+
+def login(client, user_id):
+    """Log the test client in as user_id with a stored Replit token."""
+    from database import db
+    from models import OAuth
+    
+    app = get_app().app
+    with app.app_context():
+        if db.session.query(OAuth).filter_by(user_id=user_id).first() is None:
+            db.session.add(OAuth(user_id=user_id, browser_session_key='tests',
+                                 provider='replit_auth', token={'expires_in': 3600}))
+            db.session.commit()
+    
+    with client.session_transaction() as session:
+        session['_user_id'] = user_id
+        session['_fresh'] = True
+        session['_browser_session_key'] = 'tests'
+
+
+@contextmanager
+def count_queries():
+    """Collect every SQL statement the app database runs inside the block."""
+    from database import db
+    
+    statements = []
+    
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    
+    with get_app().app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
@@ -0,0 +1,53 @@
+"""Bet highlights on the leaderboard."""
+import unittest
+import uuid
+
+from tests.support import get_app
+
+
+class LeaderboardTests(unittest.TestCase):
+    
+    @classmethod
+    def setUpClass(cls):
+        cls.app_module = get_app()
+        cls.app = cls.app_module.app
+    
+    def setUp(self):
+        from database import db
+        from models import Bet
+        
+        self.app_module.cache.clear()
+        with self.app.app_context():
+            db.session.query(Bet).delete()
+            db.session.commit()
+    
+    def add_bet(self, status, odds, odds_num):
+        from database import db
+        from models import Bet, User
+        
+        user_id = f'user-{uuid.uuid4().hex[:12]}'
+        with self.app.app_context():
+            db.session.add(User(id=user_id, username=user_id))
+            db.session.add(Bet(
+                user_id=user_id, bet_type='moneyline', description=f'{status} {odds}', amount=10.0,
+                odds=odds, odds_num=odds_num, potential_win=20.0, status=status,
+                result=10.0 if status == 'won' else -10.0, week=10,
+            ))
+            db.session.commit()
+    
+    def test_bets_without_odds_num_are_ranked_last(self):
+        # e.g. rows written by admin SQL, which never fills odds_num
+        for status in ('won', 'lost'):
+            self.add_bet(status, '+500', None)
+            self.add_bet(status, '+200', 200)
+            self.add_bet(status, '-150', -150)
+        
+        with self.app.test_request_context():
+            ctx = self.app_module._leaderboard_ctx(10)
+        
+        self.assertEqual(ctx['best_odds_bet'].odds, '+200')
+        self.assertEqual(ctx['worst_odds_bet'].odds, '-150')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,142 @@
+"""Placing bets through /api/place_bet: balance, stored bet and weekly stats."""
+import sqlite3
+import unittest
+import uuid
+
+from tests.support import get_app, login
+
+WEEK = 10
+
+
+def expected_win(amount, odds):
+    value = int(odds)
+    return amount * (value / 100 if value > 0 else 100 / -value)
+
+
+class PlaceBetTests(unittest.TestCase):
+    
+    @classmethod
+    def setUpClass(cls):
+        cls.app_module = get_app()
+        cls.app = cls.app_module.app
+        cls.odds_db = sqlite3.connect(cls.app_module.ODDS_DB_PATH)
+        cls.odds_db.row_factory = sqlite3.Row
+    
+    @classmethod
+    def tearDownClass(cls):
+        cls.odds_db.close()
+    
+    def setUp(self):
+        from database import db
+        from models import User
+        
+        self.app_module.cache.clear()
+        self.user_id = f'user-{uuid.uuid4().hex[:12]}'
+        with self.app.app_context():
+            db.session.add(User(id=self.user_id, username=self.user_id, account_balance=1000.0))
+            db.session.commit()
+        
+        self.client = self.app.test_client()
+        login(self.client, self.user_id)
+    
+    def place(self, **body):
+        response = self.client.post('/api/place_bet', json=body)
+        self.assertEqual(response.status_code, 200)
+        return response.get_json()
+    
+    def state(self):
+        from database import db
+        from models import Bet, User, WeeklyStats
+        
+        with self.app.app_context():
+            balance = db.session.get(User, self.user_id).account_balance
+            bets = db.session.query(Bet).filter_by(user_id=self.user_id).order_by(Bet.id).all()
+            stats = db.session.query(WeeklyStats).filter_by(user_id=self.user_id).all()
+            db.session.expunge_all()
+        return balance, bets, stats
+    
+    def assert_placed(self, bet_type, odds, amounts):
+        balance, bets, stats = self.state()
+        
+        self.assertAlmostEqual(balance, 1000.0 - sum(amounts))
+        self.assertEqual(len(bets), len(amounts))
+        for bet, amount in zip(bets, amounts):
+            self.assertEqual(bet.bet_type, bet_type)
+            self.assertEqual(bet.status, 'pending')
+            self.assertEqual(bet.week, WEEK)
+            self.assertEqual(bet.amount, amount)
+            self.assertEqual(bet.odds, odds)
+            if odds == 'EVEN':
+                self.assertEqual(bet.odds_num, 0)
+                self.assertAlmostEqual(bet.potential_win, amount)
+            else:
+                self.assertEqual(bet.odds_num, int(odds))
+                self.assertAlmostEqual(bet.potential_win, expected_win(amount, odds))
+        
+        # One row per user and week, bumped by every bet after the first
+        self.assertEqual(len(stats), 1)
+        stats = stats[0]
+        self.assertEqual(stats.week, WEEK)
+        self.assertEqual(stats.bets_placed, len(amounts))
+        self.assertAlmostEqual(stats.active_bets_amount, sum(amounts))
+        self.assertAlmostEqual(stats.starting_balance, 1000.0)
+        self.assertAlmostEqual(stats.ending_balance, balance)
+        self.assertAlmostEqual(stats.pnl, -sum(amounts))
+        return bets
+    
+    def test_moneyline(self):
+        matchup = self.odds_db.execute(
+            'SELECT team1_ml, team2_ml FROM betting_odds_matchup_ml WHERE week = ? ORDER BY matchup LIMIT 1',
+            (WEEK,)).fetchone()
+        
+        self.assertTrue(self.place(matchup_idx=0, team='team1', amount=10)['success'])
+        result = self.place(matchup_idx='0', team='team1', amount=15)
+        self.assertTrue(result['success'])
+        self.assertAlmostEqual(result['new_balance'], 975.0)
+        
+        bets = self.assert_placed('moneyline', matchup['team1_ml'], [10.0, 15.0])
+        self.assertIn(matchup['team1_ml'], bets[0].description)
+    
+    def test_team_over_under(self):
+        team = self.odds_db.execute(
+            'SELECT team_id, owner FROM betting_odds_team_ou WHERE week = ? LIMIT 1', (WEEK,)).fetchone()
+        
+        self.assertTrue(self.place(bet_type='team_ou', team_id=team['team_id'], choice='over', amount=20)['success'])
+        self.assertTrue(self.place(bet_type='team_ou', team_id=team['team_id'], choice='under', amount=5)['success'])
+        
+        bets = self.assert_placed('team_ou', 'EVEN', [20.0, 5.0])
+        self.assertTrue(bets[0].description.startswith(team['owner']))
+        self.assertTrue(bets[1].description.endswith('Under'))
+    
+    def test_highest_and_lowest_scorer(self):
+        for bet_type, table in (('highest_scorer', 'betting_odds_highest_scorer'),
+                                ('lowest_scorer', 'betting_odds_lowest_scorer')):
+            with self.subTest(bet_type=bet_type):
+                self.setUp()
+                row = self.odds_db.execute(
+                    f'SELECT owner, odds FROM {table} WHERE week = ? LIMIT 1', (WEEK,)).fetchone()
+                
+                self.assertTrue(self.place(bet_type=bet_type, owner=row['owner'], odds=row['odds'], amount=10)['success'])
+                self.assertTrue(self.place(bet_type=bet_type, owner=row['owner'], odds=row['odds'], amount=2.5)['success'])
+                
+                self.assert_placed(bet_type, row['odds'], [10.0, 2.5])
+    
+    def test_malformed_scorer_odds_are_rejected(self):
+        for odds in (['1'], 'EVEN', '0', '1.5', '+', '--110', 150):
+            with self.subTest(odds=odds):
+                with self.assertNoLogs(self.app.logger, 'ERROR'):
+                    result = self.place(bet_type='highest_scorer', owner='someone', odds=odds, amount=10)
+                self.assertEqual(result, {'success': False, 'error': 'Invalid odds'})
+        
+        balance, bets, stats = self.state()
+        self.assertEqual(balance, 1000.0)
+        self.assertEqual((bets, stats), ([], []))
+    
+    def test_insufficient_balance(self):
+        result = self.place(bet_type='team_ou', team_id=1, choice='over', amount=5000)
+        self.assertEqual(result, {'success': False, 'error': 'Insufficient balance'})
+        self.assertEqual(self.state(), (1000.0, [], []))
+
+
+if __name__ == '__main__':
+    unittest.main()
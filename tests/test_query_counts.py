@@ -0,0 +1,118 @@
+"""Query-count regressions for the pages that used to issue one query per row."""
+import unittest
+import uuid
+
+from sqlalchemy.exc import InvalidRequestError
+
+from tests.support import count_queries, get_app, login
+
+
+class QueryCountTests(unittest.TestCase):
+    
+    @classmethod
+    def setUpClass(cls):
+        cls.app_module = get_app()
+        cls.app = cls.app_module.app
+    
+    def setUp(self):
+        self.app_module.cache.clear()
+        self.client = self.app.test_client()
+    
+    def add_user(self, bets=0, status='pending', week=10):
+        from database import db
+        from models import Bet, User, WeeklyStats
+        
+        user_id = f'user-{uuid.uuid4().hex[:12]}'
+        with self.app.app_context():
+            db.session.add(User(id=user_id, username=user_id, first_name='Test', last_name=user_id))
+            for i in range(bets):
+                db.session.add(Bet(
+                    user_id=user_id, bet_type='moneyline', description=f'Bet {i}',
+                    amount=10.0, odds='+150', odds_num=150, potential_win=25.0,
+                    status=status, result=15.0 if status == 'won' else -10.0 if status == 'lost' else 0.0,
+                    week=week,
+                ))
+            if bets:
+                db.session.add(WeeklyStats(
+                    user_id=user_id, week=week, starting_balance=1000.0, ending_balance=1000.0,
+                    pnl=0.0, bets_placed=bets,
+                ))
+            db.session.commit()
+        return user_id
+    
+    def add_bets(self, user_id, count):
+        from database import db
+        from models import Bet
+        
+        with self.app.app_context():
+            for i in range(count):
+                db.session.add(Bet(
+                    user_id=user_id, bet_type='team_ou', description=f'Extra {i}',
+                    amount=5.0, odds='EVEN', odds_num=0, potential_win=10.0, week=10,
+                ))
+            db.session.commit()
+    
+    def test_my_bets_query_count_does_not_grow_with_bets(self):
+        user_id = self.add_user(bets=1)
+        login(self.client, user_id)
+        
+        with count_queries() as few:
+            response = self.client.get('/api/my_bets')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.get_json()), 1)
+        self.assertTrue(few)
+        
+        self.add_bets(user_id, 20)
+        with count_queries() as many:
+            response = self.client.get('/api/my_bets')
+        self.assertEqual(len(response.get_json()), 21)
+        
+        self.assertEqual(len(many), len(few))
+    
+    def test_leaderboard_query_count_does_not_grow_with_users(self):
+        self.add_user(bets=2, status='won')
+        self.add_user(bets=1, status='lost')
+        
+        with count_queries() as few:
+            response = self.client.get('/leaderboard')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(few)
+        
+        for _ in range(10):
+            self.add_user(bets=3, status='won')
+            self.add_user(bets=2, status='lost')
+            self.add_user(bets=1)
+        
+        self.app_module.cache.clear()
+        with count_queries() as many:
+            response = self.client.get('/leaderboard')
+        self.assertEqual(response.status_code, 200)
+        
+        self.assertEqual(len(many), len(few))
+    
+    def test_leaderboard_is_served_from_cache(self):
+        self.add_user(bets=1, status='won')
+        self.client.get('/leaderboard')
+        
+        with count_queries() as statements:
+            self.client.get('/leaderboard')
+        
+        # The standings and the current week both come from the cache
+        self.assertEqual(statements, [])
+    
+    def test_bet_relationships_refuse_to_lazy_load(self):
+        from database import db
+        from models import Bet, User
+        
+        user_id = self.add_user(bets=1)
+        with self.app.app_context():
+            bet = db.session.query(Bet).filter_by(user_id=user_id).one()
+            with self.assertRaises(InvalidRequestError):
+                bet.user
+            user = db.session.get(User, user_id)
+            with self.assertRaises(InvalidRequestError):
+                user.bets
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+"""Batch settlement through /api/admin/settle_bets."""
+import unittest
+import uuid
+
+from tests.support import get_app, login
+
+
+class SettleBetsTests(unittest.TestCase):
+    
+    @classmethod
+    def setUpClass(cls):
+        cls.app_module = get_app()
+        cls.app = cls.app_module.app
+    
+    def setUp(self):
+        from database import db
+        from models import Bet, User, WeeklyStats
+        
+        self.app_module.cache.clear()
+        self.admin_id = f'admin-{uuid.uuid4().hex[:12]}'
+        self.user_id = f'user-{uuid.uuid4().hex[:12]}'
+        with self.app.app_context():
+            db.session.add(User(id=self.admin_id, username=self.admin_id, is_admin=True))
+            db.session.add(User(id=self.user_id, username=self.user_id, account_balance=980.0))
+            db.session.add(WeeklyStats(user_id=self.user_id, week=10, starting_balance=1000.0,
+                                       ending_balance=980.0, pnl=-20.0, active_bets_amount=20.0, bets_placed=2))
+            bets = [Bet(user_id=self.user_id, bet_type='moneyline', description=f'Bet {i}', amount=10.0,
+                        odds='+150', odds_num=150, potential_win=25.0, week=10) for i in range(2)]
+            db.session.add_all(bets)
+            db.session.commit()
+            self.bet_ids = [bet.id for bet in bets]
+        
+        self.client = self.app.test_client()
+        login(self.client, self.admin_id)
+    
+    def test_malformed_items_are_skipped(self):
+        won_id, lost_id = self.bet_ids
+        bad_items = ['oops', {'won': True}, {'bet_id': 'abc'}, {'bet_id': True},
+                     {'bet_id': won_id, 'won': 'yes'}]
+        
+        response = self.client.post('/api/admin/settle_bets', json={'bets': bad_items + [
+            {'bet_id': str(won_id), 'won': True},
+            {'bet_id': lost_id, 'won': False},
+            {'bet_id': 999999, 'won': True},
+        ]})
+        
+        self.assertEqual(response.status_code, 200)
+        body = response.get_json()
+        self.assertTrue(body['success'])
+        self.assertEqual(body['settled'], [won_id, lost_id])
+        self.assertEqual(body['skipped'], bad_items + [999999])
+    
+    def test_body_without_valid_items_is_rejected(self):
+        for body in ({'bets': [None, 5]}, {'bets': 'x'}, [1, 2]):
+            response = self.client.post('/api/admin/settle_bets', json=body)
+            self.assertEqual(response.status_code, 200)
+            self.assertFalse(response.get_json()['success'])
+
+
+if __name__ == '__main__':
+    unittest.main()
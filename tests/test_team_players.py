@@ -0,0 +1,50 @@
+"""ETag and response caching for /api/team_players."""
+import unittest
+import uuid
+from unittest import mock
+
+from tests.support import get_app, login
+
+TEAM = 'sfaizi24'
+
+
+class TeamPlayersTests(unittest.TestCase):
+    
+    @classmethod
+    def setUpClass(cls):
+        cls.app_module = get_app()
+        cls.app = cls.app_module.app
+    
+    def setUp(self):
+        from database import db
+        from models import User
+        
+        self.app_module.cache.clear()
+        user_id = f'user-{uuid.uuid4().hex[:12]}'
+        with self.app.app_context():
+            db.session.add(User(id=user_id, username=user_id))
+            db.session.commit()
+        
+        self.client = self.app.test_client()
+        login(self.client, user_id)
+    
+    def test_error_is_not_cached_or_tagged(self):
+        with mock.patch.object(self.app_module, '_compute_team_players', side_effect=RuntimeError('boom')):
+            response = self.client.get('/api/team_players', query_string={'team': TEAM})
+        self.assertEqual(response.status_code, 500)
+        self.assertIsNone(response.headers.get('ETag'))
+        self.assertNotIn('boom', response.get_data(as_text=True))
+        
+        # Once the data can be read again the roster comes back in full
+        response = self.client.get('/api/team_players', query_string={'team': TEAM})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.get_json()['starters'])
+        etag = response.headers['ETag']
+        
+        response = self.client.get('/api/team_players', query_string={'team': TEAM},
+                                   headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+
+
+if __name__ == '__main__':
+    unittest.main()